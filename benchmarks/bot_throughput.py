@@ -0,0 +1,69 @@
+import argparse
+import logging
+import resource
+import time
+
+import spybot
+from spybot.fakeserver import FakeServer
+
+
+def echo(event):
+    return spybot.reply.Text(event.sender, str(event.time))
+
+
+def rss():
+    with open('/proc/self/status') as fd:
+        for line in fd:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run(arguments):
+    server = FakeServer(events=arguments.events
+                       ,rate=arguments.rate
+                       ,senders=arguments.senders
+                       ,latency=arguments.latency
+                       ,error_rate=arguments.error_rate
+                       ,throttle_rate=arguments.throttle_rate
+                       ,seed=1).start()
+    bot = spybot.Bot('TOKEN'
+                    ,base_url=server.url
+                    ,event_handler=echo
+                    ,workers=arguments.workers
+                    ,send_workers=arguments.send_workers
+                    ,send_retry_max=3
+                    ,get_retry_policy=spybot.retry.RetryPolicy(base_delay=0)
+                    ,warn_not_implemented=True)
+    start = time.perf_counter()
+    bot.get_messages(echo)
+    read = time.perf_counter() - start
+    bot.close()
+    elapsed = time.perf_counter() - start
+    server.stop()
+    return (read, elapsed, server.stats(), rss())
+
+
+def milliseconds(value):
+    return '-' if value == None else '{:.2f}ms'.format(value * 1000)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bot throughput against the local fake server')
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--rate', type=float, default=0)
+    parser.add_argument('--senders', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--send-workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    (read, elapsed, stats, memory) = run(arguments)
+    print('events:           {}'.format(stats['emitted']))
+    print('replies:          {} ({} failed, {} throttled)'.format(stats['received'], stats['failed'], stats['throttled']))
+    print('stream read:      {:.0f} events/sec'.format(stats['emitted'] / read))
+    print('end to end:       {:.0f} events/sec'.format(stats['received'] / elapsed))
+    print('reply latency:    p50 {} p99 {}'.format(milliseconds(stats['p50']), milliseconds(stats['p99'])))
+    print('RSS:              {:.1f} MiB'.format(memory / 1048576.0))
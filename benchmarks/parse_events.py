@@ -0,0 +1,41 @@
+import sys
+import time
+import tracemalloc
+
+from spybot.event import parse
+
+
+EVENTS = [{'type': 'TEXT', 'from': 'LC00A1', 'time': '1538918596120', 'body': 'Hello'}
+         ,{'type': 'FILE', 'from': 'LC00A1', 'time': '1538918596120', 'fileType': 'IMAGE', 'fileUrl': 'abc'
+          ,'fileName': 'a.jpg', 'fileSize': 1024, 'thumbnailUrl': 'def', 'imageWidth': 640, 'imageHeight': 480}
+         ,{'type': 'FILE', 'from': 'LC00A1', 'time': '1538918596120', 'fileType': 'VIDEO', 'fileUrl': 'abc'
+          ,'fileName': 'a.mp4', 'fileSize': 1024, 'fileDuration': 1000, 'thumbnailUrl': 'def'
+          ,'thumbnailWidth': 64, 'thumbnailHeight': 48}
+         ,{'type': 'FILE', 'from': 'LC00A1', 'time': '1538918596120', 'fileUrl': 'abc', 'fileName': 'a.zip'
+          ,'fileSize': 1024}
+         ,{'type': 'LOCATION', 'from': 'LC00A1', 'time': '1538918596120', 'latitude': 35.7, 'longitude': 51.4}
+         ,{'type': 'START', 'from': 'LC00A1', 'time': '1538918596120'}]
+
+
+def throughput(count):
+    events = EVENTS * (count // len(EVENTS))
+    start = time.perf_counter()
+    for event in events:
+        parse(event)
+    return len(events) / (time.perf_counter() - start)
+
+
+def memory(count):
+    events = EVENTS * (count // len(EVENTS))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    parsed = [parse(event) for event in events]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(parsed)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 600000
+    print('parse throughput: {:.0f} events/sec'.format(throughput(count)))
+    print('memory per event: {:.0f} bytes'.format(memory(count // 10)))
@@ -28,4 +28,5 @@ setup(name='spybot'
      ,platforms=['Any']
      ,packages=find_packages()
      ,install_requires=['requests']
+     ,extras_require={'async': ['aiohttp'], 'fast': ['orjson']}
      ,setup_requires=['pytest-runner'])
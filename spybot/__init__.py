@@ -8,3 +8,7 @@ __email__       = "pouriya.jahanbakhsh@gmail.com"
 
 
 from .api import Bot
+from .aio import AsyncBot
+from .router import Router
+from .shard import ShardedBot
+from . import ratelimit, retry, cache, outbox, session, metrics, trace
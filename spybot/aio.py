@@ -0,0 +1,393 @@
+import asyncio
+import logging
+import time
+from inspect import isawaitable, isgenerator, isasyncgen
+from os.path import join
+from os import getcwd
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from spybot.api import Bot
+from spybot.reply import is_reply
+from spybot.event import parse
+from spybot.utils import log, is_async_callable
+from spybot.stream import StreamDecoder
+from spybot.codec import get_codec, ENCODE_ERRORS, DECODE_ERRORS
+from spybot.send import SendResults
+from spybot.retry import RetryPolicy
+from spybot.session import MemorySessionStore
+
+logger = logging.getLogger(__name__)
+
+
+async def _iterate(replies):
+    if isasyncgen(replies):
+        async for reply in replies:
+            yield reply
+        return
+    loop = asyncio.get_running_loop()
+    done = object()
+    while True:
+        reply = await loop.run_in_executor(None, next, replies, done)
+        if reply is done:
+            return
+        yield reply
+
+
+class AsyncBot:
+
+    BASE_URL           = Bot.BASE_URL
+    STREAM_STABLE_TIME = Bot.STREAM_STABLE_TIME
+
+    def __init__(self
+                ,token
+                ,request_timeout      = 0
+                ,warn_not_implemented = False
+                ,get_retry_max        = 0
+                ,event_handler        = None
+                ,concurrency          = 1000
+                ,pool_maxsize         = 100
+                ,pool_per_host        = 0
+                ,codec                = None
+                ,structured_logging   = False
+                ,ordered_replies      = False
+                ,rate_limiter         = None
+                ,get_retry_policy     = None
+                ,sessions             = None
+                ,base_url             = None):
+        if aiohttp == None:
+            raise ImportError('AsyncBot needs \'aiohttp\', install it with `pip install spybot[async]`')
+        self.token                = token
+        if base_url != None:
+            self.BASE_URL         = base_url.rstrip('/')
+        self.request_timeout      = request_timeout
+        self.warn_not_implemented = warn_not_implemented
+        self.get_retry_max        = get_retry_max
+        self.get_retry_count      = 0
+        self.stream_end_count     = 0
+        self.event_handler        = event_handler
+        self.concurrency          = concurrency
+        self.pool_maxsize         = pool_maxsize
+        self.pool_per_host        = pool_per_host
+        self.codec                = get_codec(codec)
+        self.structured_logging   = structured_logging
+        self.ordered_replies      = ordered_replies
+        self.rate_limiter         = rate_limiter
+        self.get_retry_policy     = get_retry_policy if get_retry_policy != None else \
+                                    RetryPolicy(max_retries=get_retry_max, name='get')
+        self.sessions             = sessions if sessions != None else MemorySessionStore()
+        self.session              = None
+        self._semaphore           = None
+        self._tasks               = set()
+        self._handler_arguments   = {}
+        self._handler_async       = {}
+        if event_handler != None:
+            self._handler_argument_count(event_handler)
+            self._is_async_handler(event_handler)
+
+
+    async def _get_session(self):
+        if self.session == None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize
+                                            ,limit_per_host=self.pool_per_host)
+            if self.request_timeout:
+                timeout = aiohttp.ClientTimeout(sock_connect=self.request_timeout
+                                               ,sock_read=self.request_timeout)
+            else:
+                timeout = aiohttp.ClientTimeout(total=None)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+
+    async def _handle_get_retry(self, exception):
+        await self.get_retry_policy.retry_async(exception, self.get_retry_count)
+        self.get_retry_count += 1
+
+
+    async def _handle_stream_end(self, received, opened):
+        if received or time.monotonic() - opened >= self.STREAM_STABLE_TIME:
+            self.stream_end_count = 0
+        delay = self.get_retry_policy.delay(self.stream_end_count)
+        logger.info('message stream closed after %d frame(s), reconnecting in %.2fs', received, delay)
+        await asyncio.sleep(delay)
+        self.stream_end_count += 1
+
+
+    async def run(self):
+        try:
+            while True:
+                await self.get_messages(self.event_handler)
+        finally:
+            await self.close()
+
+
+    async def get_messages(self, event_handler):
+        if self._semaphore == None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        URI = "{}/{}/getMessage".format(self.BASE_URL, self.token)
+        session = await self._get_session()
+        try:
+            req = await session.get(URI)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            logger.error('could not make HTTP request to %r', self.BASE_URL)
+            await self._handle_get_retry(error)
+            return
+        try:
+            if req.status != 200:
+                logger.error('got HTTP status code %r', req.status)
+                await self._handle_get_retry(ConnectionError('got HTTP status code {!r}'.format(req.status)))
+                return
+            received = 0
+            opened   = time.monotonic()
+            try:
+                decoder = StreamDecoder(encoding=None)
+                async for chunk in req.content.iter_any():
+                    for frame in decoder.feed(chunk):
+                        if not received:
+                            self.get_retry_count = 0
+                        received += 1
+                        logger.debug('got new frame %r', frame)
+                        await self._dispatch(frame, event_handler)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                logger.error('could not read stream chunks')
+                await self._handle_get_retry(error)
+                return
+            await self._handle_stream_end(received, opened)
+        finally:
+            req.release()
+
+
+    async def _dispatch(self, chunk, event_handler):
+        await self._semaphore.acquire()
+        task = asyncio.ensure_future(self._handle_event(chunk, event_handler))
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        self._semaphore.release()
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error != None:
+            logger.error('event handling failed with %r', error)
+
+
+    async def _handle_event(self, event, event_handler):
+        try:
+            event = self.codec.loads(event)
+        except DECODE_ERRORS:
+            raise ValueError('could not decode chunk {!r}'.format(event))
+        logger.debug('decoded chunk successfully')
+
+        try:
+            event = parse(event)
+        except NotImplementedError as error:
+            if self.warn_not_implemented:
+                logger.warning('got unknown event %r, skipping', event)
+                return
+            raise error
+        log(logger, logging.INFO, 'got new event', event, self.structured_logging)
+
+        if event.is_file:
+            event = self._add_download_method(event)
+
+        logger.debug('running event handler function %s', event_handler)
+        arguments = self._handler_argument_count(event_handler) if event_handler else 0
+        try:
+            if not event_handler:
+                (handler, parameters) = (self.handle_event, (event,))
+            elif arguments == 1:
+                (handler, parameters) = (event_handler, (event,))
+            elif arguments == 2:
+                (handler, parameters) = (event_handler, (self, event))
+            else:
+                (handler, parameters) = (event_handler, (self, event, self.sessions.get(event.sender)))
+            if self._is_async_handler(handler):
+                result = handler(*parameters)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(None, handler, *parameters)
+            if isawaitable(result):
+                result = await result
+            await self._handle_result(result, event_handler)
+        finally:
+            if event.is_stop:
+                self.sessions.delete(event.sender)
+            elif arguments == 3:
+                self.sessions.save(event.sender)
+
+
+    async def _handle_result(self, result, event_handler):
+        if result == None:
+            logger.debug('event handler function does not yield anything')
+            return
+        if type(result) == list:
+            for item in result:
+                if not is_reply(item):
+                    raise ValueError("unknown reply item {!r}".format(item))
+                log(logger, logging.INFO, 'event handler function yielded reply with', item, self.structured_logging)
+            self._log_send_failures(await self.send_replies(result, ordered=self.ordered_replies))
+            return
+        if isgenerator(result) or isasyncgen(result):
+            self._log_send_failures(await self._send_yielded_replies(result))
+            return
+        if is_reply(result):
+            log(logger, logging.INFO, 'event handler function yielded reply with', result, self.structured_logging)
+            await self._handle_reply(result)
+            return
+        raise ValueError('event handler function {} does not yield valid return value'.format(event_handler))
+
+
+    _handler_argument_count = Bot._handler_argument_count
+    _log_send_failures      = Bot._log_send_failures
+
+
+    def _is_async_handler(self, event_handler):
+        kind = self._handler_async.get(event_handler)
+        if kind == None:
+            kind = self._handler_async[event_handler] = is_async_callable(event_handler)
+        return kind
+
+
+    async def _send_yielded_replies(self, replies):
+        tasks = []
+        last  = {}
+        async for reply in _iterate(replies):
+            if not is_reply(reply):
+                raise ValueError("unknown reply item {!r}".format(reply))
+            log(logger, logging.INFO, 'event handler function yielded reply with', reply, self.structured_logging)
+            previous = last.get(reply.reply['to']) if self.ordered_replies else None
+            task     = asyncio.ensure_future(self._send_reply_after(previous, reply))
+            if self.ordered_replies:
+                last[reply.reply['to']] = task
+            tasks.append(task)
+        results = await asyncio.gather(*tasks)
+        return SendResults([(reply, result) for (reply, result) in results])
+
+
+    async def _send_reply_after(self, previous, reply):
+        if previous != None:
+            await asyncio.wait([previous])
+        return (reply, await self._send_reply(reply))
+
+
+    def _add_download_method(self, event):
+        URL  = self.get_download_url(event.url)
+        name = event.name
+        async def download(path=None):
+            session = await self._get_session()
+            if path == None:
+                path = getcwd()
+            filename = join(path, name)
+            try:
+                async with session.get(URL) as req:
+                    with open(filename, 'wb') as fd:
+                        async for chunk in req.content.iter_chunked(65536):
+                            fd.write(chunk)
+            except aiohttp.ClientError:
+                logger.error('could not get file %r', name)
+                return False
+            logger.info('file %r downloaded successfully and saved to %s', name, path)
+            return True
+        event.download = download
+        return event
+
+
+    def get_download_url(self, event_url):
+        URL = "{}/{}/downloadFile/{}".format(self.BASE_URL, self.token, event_url)
+        return URL
+
+
+    async def _handle_reply(self, reply):
+        recipient = reply.reply['to']
+        try:
+            data = reply.encode(self.codec)
+        except ENCODE_ERRORS:
+            raise ValueError("could not encode reply value {!r} to JSON".format(reply.reply))
+        logger.debug('wraped reply successfully')
+        return await self._send_message(data, recipient)
+
+
+    async def _send_message(self, data, recipient=None):
+        if not self.rate_limiter:
+            return await self.send_message(data)
+        throttle_count = 0
+        while True:
+            await self.rate_limiter.acquire_async(recipient)
+            result = await self.send_message(data)
+            if not self.rate_limiter.is_throttle(result):
+                self.rate_limiter.succeeded()
+                return result
+            self.rate_limiter.throttled()
+            if throttle_count == self.rate_limiter.max_retries:
+                logger.error('giving up sending message to %r after %d throttled attempts', recipient, throttle_count + 1)
+                return result
+            await asyncio.sleep(self.rate_limiter.backoff(throttle_count))
+            throttle_count += 1
+
+
+    async def send_replies(self, replies, ordered=False):
+        replies = list(replies)
+        for reply in replies:
+            if not is_reply(reply):
+                raise ValueError("unknown reply item {!r}".format(reply))
+        if not ordered:
+            results = await asyncio.gather(*[self._send_reply(reply) for reply in replies])
+            return SendResults(list(zip(replies, results)))
+        groups = {}
+        for (index, reply) in enumerate(replies):
+            groups.setdefault(reply.reply['to'], []).append(index)
+        results = [None] * len(replies)
+        async def send_group(indexes):
+            for index in indexes:
+                results[index] = await self._send_reply(replies[index])
+        await asyncio.gather(*[send_group(indexes) for indexes in groups.values()])
+        return SendResults(list(zip(replies, results)))
+
+
+    async def _send_reply(self, reply):
+        try:
+            return await self._handle_reply(reply)
+        except Exception as error:
+            return (False, None, error)
+
+
+    async def send_message(self, data):
+        URI = "{}/{}/sendMessage".format(self.BASE_URL, self.token)
+        headers = {'Content-Type': 'application/json', 'Accept':'application/json'}
+        session = await self._get_session()
+        async with session.post(URI, headers=headers, data=data) as req:
+            response = await req.read()
+            if req.status != 200:
+                logger.error('got HTTP status code %r for send operation', req.status)
+                return (False, req.status, 'unknown response {!r}'.format(response))
+        logger.debug('got send response %r', response)
+        try:
+            response = self.codec.loads(response)
+            status_code = response['resultCode']
+            if status_code == 200:
+                log(logger, logging.INFO, 'sent message successfully', structured=self.structured_logging)
+                return (True, 200, None)
+            message = response['resultMessage']
+            logger.error('could not send message because %r', message)
+            return (False, status_code, message)
+        except (KeyError, TypeError) + DECODE_ERRORS:
+            logger.error('got error %r for send operation', response)
+            return (False, 200, 'unknown response {!r}'.format(response))
+
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        if self.session != None:
+            await self.session.close()
+            self.session = None
+        self.sessions.close()
+
+
+    def handle_event(self, event):
+        pass
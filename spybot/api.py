@@ -1,18 +1,36 @@
 import requests
-import json
+import hashlib
 import logging
-from inspect import getfullargspec
-from os.path import join
-from os import getcwd
+import time
+import threading
+from inspect import isgenerator
+from concurrent.futures import Future
+from collections import OrderedDict
+from os.path import join, exists, getsize
+from os import getcwd, replace
 
-from spybot.reply import is_reply
+from spybot.reply import is_reply, ReplyTemplate
 from spybot.event import parse
+from spybot.utils import log, argument_count
+from spybot.pool import ConnectionPool
+from spybot.dispatch import SerialExecutor
+from spybot.scheduler import SendScheduler, INTERACTIVE, BULK
+from spybot.send import SendResults, BroadcastResults, future_result
+from spybot.retry import RetryPolicy
+from spybot.session import MemorySessionStore
+from spybot.metrics import BotMetrics
+from spybot.trace import Tracer
+from spybot.download import DownloadProgress, DownloadStream, DownloadManager, total_size
+from spybot.upload import MultipartStream, UploadedFile, open_upload, is_seekable, file_digest, file_size
+from spybot.stream import StreamDecoder, iter_frames
+from spybot.codec import get_codec, ENCODE_ERRORS, DECODE_ERRORS
 
 logger = logging.getLogger(__name__)
 
 class Bot:
 
-    BASE_URL = "https://bot.sapp.ir"
+    BASE_URL           = "https://bot.sapp.ir"
+    STREAM_STABLE_TIME = 60.0
 
     def __init__(self
                 ,token
@@ -20,28 +38,85 @@ class Bot:
                 ,warn_not_implemented = False
                 ,get_retry_max        = 0
                 ,send_retry_max       = 0
-                ,event_handler        = None):
+                ,event_handler        = None
+                ,pool                 = None
+                ,workers              = 0
+                ,codec                = None
+                ,structured_logging   = False
+                ,send_workers         = 8
+                ,ordered_replies      = False
+                ,rate_limiter         = None
+                ,get_retry_policy     = None
+                ,send_retry_policy    = None
+                ,download_retry_policy= None
+                ,download_workers     = 4
+                ,cache                = None
+                ,outbox               = None
+                ,sessions             = None
+                ,base_url             = None
+                ,metrics              = None
+                ,metrics_port         = 0
+                ,tracer               = None):
         self.token                = token
+        if base_url != None:
+            self.BASE_URL         = base_url.rstrip('/')
         self.request_timeout      = request_timeout
         self.warn_not_implemented = warn_not_implemented
         self.get_retry_max        = get_retry_max
         self.get_retry_count      = 0
+        self.stream_end_count     = 0
         self.send_retry_max       = send_retry_max
-        self.send_retry_count     = 0
         self.event_handler        = event_handler
+        self.pool                 = pool if pool != None else ConnectionPool(pool_maxsize=max(10, workers + send_workers + download_workers + 1))
+        self.workers              = workers
+        self.dispatcher           = SerialExecutor(workers) if workers else None
+        self.codec                = get_codec(codec)
+        self.structured_logging   = structured_logging
+        self.send_workers         = send_workers
+        self.ordered_replies      = ordered_replies
+        self.sender               = SendScheduler(send_workers)
+        self.rate_limiter         = rate_limiter
+        self.get_retry_policy     = get_retry_policy if get_retry_policy != None else \
+                                    RetryPolicy(max_retries=get_retry_max, name='get')
+        self.send_retry_policy    = send_retry_policy if send_retry_policy != None else \
+                                    RetryPolicy(max_retries=send_retry_max, name='send')
+        self.download_retry_policy= download_retry_policy if download_retry_policy != None else \
+                                    RetryPolicy(max_retries=get_retry_max, name='download')
+        self.downloads            = DownloadManager(self, download_workers)
+        self.cache                = cache
+        self.outbox               = outbox
+        self.sessions             = sessions if sessions != None else MemorySessionStore()
+        self.metrics              = metrics if isinstance(metrics, BotMetrics) else BotMetrics(metrics)
+        if metrics_port:
+            self.metrics.registry.serve(metrics_port)
+        self.tracer               = tracer if tracer != None else Tracer()
+        self.uploads              = OrderedDict()
+        self.uploads_max          = 4096
+        self._uploads_lock        = threading.Lock()
+        self._handler_arguments   = {}
+        if event_handler != None:
+            self._handler_argument_count(event_handler)
 
 
     def _handle_get_retry(self, exception):
-        if not self.get_retry_max:
-            raise exception
-        elif self.get_retry_max == self.get_retry_count:
-            logger.debug('reached max \'get\' retry')
-            raise exception
-        elif self.get_retry_max > 0:
-            self.get_retry_count += 1
+        self.get_retry_policy.retry(exception, self.get_retry_count)
+        self.get_retry_count += 1
+        self.metrics.reconnects.inc()
+
+
+    def _handle_stream_end(self, received, opened):
+        if received or time.monotonic() - opened >= self.STREAM_STABLE_TIME:
+            self.stream_end_count = 0
+        delay = self.get_retry_policy.delay(self.stream_end_count)
+        logger.info('message stream closed after %d frame(s), reconnecting in %.2fs', received, delay)
+        time.sleep(delay)
+        self.stream_end_count += 1
+        self.metrics.reconnects.inc()
 
 
     def run(self):
+        if self.outbox:
+            self.replay_outbox()
         while True:
             self.get_messages(self.event_handler)
 
@@ -50,170 +125,476 @@ class Bot:
         URI = "{}/{}/getMessage".format(self.BASE_URL, self.token)
         try:
             if self.request_timeout:
-                req = requests.get(URI, stream=True, timeout=self.request_timeout)
+                req = self.pool.get(URI, stream=True, timeout=self.request_timeout)
             else:
-                req = requests.get(URI, stream=True)
+                req = self.pool.get(URI, stream=True)
         except Exception as error:
-            logger.error('could not make HTTP request to {!r}'.format(self.BASE_URL))
+            logger.error('could not make HTTP request to %r', self.BASE_URL)
             self._handle_get_retry(error)
             return
         if req.status_code == 200:
+            received = 0
+            opened   = time.monotonic()
             try:
-                for chunk in req.iter_content(chunk_size=None):
-                    chunk = chunk.decode()
-                    logger.debug('got new chunk {!r}'.format(chunk))
-                    if chunk.startswith('{'):
-                        self._handle_event(chunk, event_handler)
-                        continue
-                    logger.debug('skipping chunk')
-            except requests.exceptions.ConnectionError as error:
+                frames = iter_frames(req.iter_content(chunk_size=None), StreamDecoder(encoding=None))
+                while True:
+                    with self.tracer.span('read'):
+                        frame = next(frames, None)
+                    if frame == None:
+                        break
+                    if not received:
+                        self.get_retry_count = 0
+                    received += 1
+                    logger.debug('got new frame %r', frame)
+                    self._handle_event(frame, event_handler)
+            except requests.exceptions.RequestException as error:
                 logger.error('could not read stream chunks')
                 req.close()
                 self._handle_get_retry(error)
                 return
+            self._handle_stream_end(received, opened)
         else:
-            logger.error('got HTTP status code {!r}'.format(req.status_code))
+            logger.error('got HTTP status code %r', req.status_code)
             req.close()
-            self._handle_get_retry(error)
+            self._handle_get_retry(ConnectionError('got HTTP status code {!r}'.format(req.status_code)))
             return
 
 
-    def _handle_event(self, event, event_handler):
+    def _parse_frame(self, frame):
         try:
-            event = json.loads(event)
-        except json.decoder.JSONDecodeError:
-            raise ValueError('could not decode chunk')
+            with self.tracer.span('decode'):
+                event = self.codec.loads(frame)
+        except DECODE_ERRORS:
+            self.metrics.parse_failures.inc(('decode',))
+            raise ValueError('could not decode chunk {!r}'.format(frame))
         logger.debug('decoded chunk successfully')
 
         try:
-            event = parse(event)
+            with self.tracer.data_span('parse', event):
+                event = parse(event)
         except NotImplementedError as error:
+            self.metrics.parse_failures.inc(('not_implemented',))
             if self.warn_not_implemented:
-                logger.warning('got unknown event {!r}, skipping'.format(event))
-                return
+                logger.warning('got unknown event %r, skipping', event)
+                return None
             raise error
-        logger.info('got new event {}'.format(event))
+        except (LookupError, ValueError):
+            self.metrics.parse_failures.inc(('invalid',))
+            raise
+        self.metrics.events.inc((event.type, event.mediatype if event.is_file else ''))
+        return event
+
+
+    def _handle_event(self, event, event_handler):
+        event = self._parse_frame(event)
+        if event == None:
+            return
+        log(logger, logging.INFO, 'got new event', event, self.structured_logging)
         
         if event.is_file:
-            event = self._add_download_method(event)
+            with self.tracer.event_span('download_methods', event):
+                event = self._add_download_method(event)
+
+        if self.dispatcher:
+            future = self.dispatcher.submit(event.sender, self._run_event_handler, event, event_handler)
+            future.add_done_callback(self._event_handler_done)
+            return
+        self._run_event_handler(event, event_handler)
+
+
+    def _event_handler_done(self, future):
+        error = future.exception()
+        if error != None:
+            logger.error('event handling failed with %r', error)
 
-        logger.debug('running event handler function {}'.format(event_handler))
-        if not event_handler:
-            result = self.handle_event(event)
-        else:
-            argument_count = len(getfullargspec(event_handler).args)
-            if argument_count == 1:
-                result = event_handler(event)
-            elif argument_count == 2:
-                result = event_handler(self, event)
-            else:
-                raise ValueError('event handler function {!r} MUST accept one or two argument(s)'.format(event_handler))
 
+    def _run_event_handler(self, event, event_handler):
+        logger.debug('running event handler function %s', event_handler)
+        arguments = self._handler_argument_count(event_handler) if event_handler else 0
+        started   = time.perf_counter()
+        try:
+            try:
+                with self.tracer.sample(event), self.tracer.event_span('handler', event):
+                    if not event_handler:
+                        result = self.handle_event(event)
+                    elif arguments == 1:
+                        result = event_handler(event)
+                    elif arguments == 2:
+                        result = event_handler(self, event)
+                    else:
+                        result = event_handler(self, event, self.sessions.get(event.sender))
+            finally:
+                self.metrics.handler_time.observe(time.perf_counter() - started)
+            self._handle_result(result, event_handler)
+        finally:
+            if event.is_stop:
+                self.sessions.delete(event.sender)
+            elif arguments == 3:
+                self.sessions.save(event.sender)
+
+
+    def _handle_result(self, result, event_handler):
         if result == None:
             logger.debug('event handler function does not yield anything')
             return
         if type(result) == list:
             for item in result:
-                if is_reply(item):
-                    logger.info('event handler function yielded reply with {}'.format(item))
-                    self._handle_reply(item)
-                else:
+                if not is_reply(item):
                     raise ValueError("unknown reply item {!r}".format(item))
+                log(logger, logging.INFO, 'event handler function yielded reply with', item, self.structured_logging)
+            self._log_send_failures(self.send_replies(result, ordered=self.ordered_replies))
+            return
+        if isgenerator(result):
+            self._log_send_failures(self.send_replies(self._yielded_replies(result), ordered=self.ordered_replies))
             return
         if is_reply(result):
-            logger.info('event handler function yielded reply with {}'.format(result))
-            self._handle_reply(result)
+            log(logger, logging.INFO, 'event handler function yielded reply with', result, self.structured_logging)
+            self._schedule_reply(INTERACTIVE, result.reply['to'], result).result()
             return
         raise ValueError('event handler function {} does not yield valid return value'.format(event_handler))
 
 
+    def _log_send_failures(self, results):
+        for (reply, (_, status_code, message)) in results.failures():
+            logger.error('could not send reply to %r (status code -> %r, error -> %r)', reply.reply['to'], status_code, message)
+
+
+    def _handler_argument_count(self, event_handler):
+        arguments = self._handler_arguments.get(event_handler)
+        if arguments == None:
+            arguments = argument_count(event_handler)
+            if arguments not in (1, 2, 3):
+                raise ValueError('event handler function {!r} MUST accept one, two or three argument(s)'.format(event_handler))
+            self._handler_arguments[event_handler] = arguments
+        return arguments
+
+
+    def _yielded_replies(self, replies):
+        for reply in replies:
+            if not is_reply(reply):
+                raise ValueError("unknown reply item {!r}".format(reply))
+            log(logger, logging.INFO, 'event handler function yielded reply with', reply, self.structured_logging)
+            yield reply
+
+
     def _add_download_method(self, event):
         URL  = self.get_download_url(event.url)
         name = event.name
-        def download(path=None):
-            try:
-                req = requests.get(URL)
-            except requests.exceptions.ConnectionError as error:
-                logger.error('could not get file {!r}'.format(name))
-                req.close()
-                self._handle_get_retry(error)
-                return False
+        def download(path=None, chunk_size=65536, resume=True, on_progress=None):
             if path == None:
                 path = getcwd()
             filename = join(path, name)
             try:
-                fd = open(filename, 'wb')
-                fd.write(req.content)
-                logger.error('file {!r} downloaded successfully and saved to {}'.format(name, path))
+                result = self.download_file(URL, filename, chunk_size, resume, on_progress)
+            except requests.exceptions.RequestException:
+                logger.error('could not get file %r', name)
+                return False
+            logger.info('file %r downloaded successfully and saved to %s (%s)', name, path, result)
+            return True
+        def download_async(path=None, **kwargs):
+            if path == None:
+                path = getcwd()
+            return self.downloads.submit(URL, join(path, name), **kwargs)
+        event.download       = download
+        event.download_async = download_async
+        if getattr(event, 'thumbnail_url', None):
+            thumbnail_URL = self.get_download_url(event.thumbnail_url)
+            def download_thumbnail(path=None, filename=None):
+                if path == None:
+                    path = getcwd()
+                if filename == None:
+                    filename = 'thumbnail-' + name
+                try:
+                    self.download_file(thumbnail_URL, join(path, filename))
+                except requests.exceptions.RequestException:
+                    logger.error('could not get thumbnail of file %r', name)
+                    return False
                 return True
-            except Exception as error:
-                logger.error('could not write file contents to {!r}'.format(filename))
-                raise
-        event.download = download
+            event.download_thumbnail = download_thumbnail
         return event
 
 
+    def _file_url(self, target):
+        if getattr(target, 'is_file', False):
+            return self.get_download_url(target.url)
+        return target
+
+
+    def open_download(self, target, chunk_size=65536, offset=0):
+        URL     = self._file_url(target)
+        headers = {'Range': 'bytes={}-'.format(offset)} if offset else None
+        if self.request_timeout:
+            req = self.pool.get(URL, stream=True, headers=headers, timeout=self.request_timeout)
+        else:
+            req = self.pool.get(URL, stream=True, headers=headers)
+        if req.status_code == 416 and offset:
+            req.close()
+            return None
+        if req.status_code not in (200, 206):
+            req.close()
+            raise requests.exceptions.HTTPError('got HTTP status code {!r} for file {!r}'.format(req.status_code, URL))
+        if req.status_code == 200:
+            offset = 0
+        progress = DownloadProgress(URL, offset=offset)
+        progress.total = total_size(req, offset)
+        return DownloadStream(req, progress, chunk_size)
+
+
+    def download_file(self, target, filename, chunk_size=65536, resume=True, on_progress=None):
+        URL       = self._file_url(target)
+        if self.cache and self.cache.get(URL, filename):
+            progress          = DownloadProgress(URL, filename)
+            progress.total    = getsize(filename)
+            progress.received = progress.total
+            progress.finished = progress.started
+            return progress
+        part_name = '{}.{}.part'.format(filename, hashlib.sha256(URL.encode('utf-8')).hexdigest()[:16])
+        attempt   = 0
+        while True:
+            offset = getsize(part_name) if resume and exists(part_name) else 0
+            try:
+                stream = self.open_download(URL, chunk_size, offset)
+                if stream == None:
+                    progress          = DownloadProgress(URL, filename, offset)
+                    progress.total    = offset
+                    progress.finished = progress.started
+                    break
+                progress      = stream.progress
+                progress.path = filename
+                try:
+                    with stream, open(part_name, 'ab' if progress.offset else 'wb') as fd:
+                        for chunk in stream:
+                            fd.write(chunk)
+                            if on_progress:
+                                on_progress(progress)
+                finally:
+                    self.metrics.download_bytes.inc(amount=progress.received)
+                break
+            except requests.exceptions.RequestException as error:
+                self.download_retry_policy.retry(error, attempt)
+                attempt += 1
+                resume   = True
+        replace(part_name, filename)
+        if self.cache:
+            self.cache.put(URL, filename)
+        return progress
+
+
+    def upload_file(self, path_or_fileobj, name=None, size=None, content_type='application/octet-stream', memoize=True):
+        (fd, owned, name) = open_upload(path_or_fileobj, name)
+        try:
+            if size == None:
+                size = file_size(fd)
+            if memoize and is_seekable(fd):
+                position = fd.tell()
+                digest   = file_digest(fd, size=size)
+                fd.seek(position)
+                with self._uploads_lock:
+                    uploaded = self.uploads.get(digest)
+                    if uploaded != None:
+                        self.uploads.move_to_end(digest)
+                if uploaded != None:
+                    logger.debug('file %r is already uploaded as %r', name, uploaded.url)
+                    return uploaded
+            body    = MultipartStream(fd, size, name, content_type=content_type)
+            URI     = "{}/{}/uploadFile".format(self.BASE_URL, self.token)
+            headers = {'Content-Type': body.content_type, 'Accept': 'application/json'}
+            if self.request_timeout:
+                req = self.pool.post(URI, headers=headers, timeout=self.request_timeout, data=body)
+            else:
+                req = self.pool.post(URI, headers=headers, data=body)
+        finally:
+            if owned:
+                fd.close()
+        if req.status_code != 200:
+            raise requests.exceptions.HTTPError('got HTTP status code {!r} for upload of file {!r}'.format(req.status_code, name))
+        try:
+            response = self.codec.loads(req.content)
+            status_code = response['resultCode']
+            if status_code != 200:
+                raise ValueError('could not upload file {!r} because {!r}'.format(name, response.get('resultMessage')))
+            url = response['fileUrl']
+        except (KeyError, TypeError) + DECODE_ERRORS:
+            raise ValueError('got unknown response {!r} for upload of file {!r}'.format(req.content, name))
+        uploaded = UploadedFile(url, name, size, body.digest.hexdigest())
+        logger.info('uploaded file %s', uploaded)
+        if memoize:
+            with self._uploads_lock:
+                self.uploads[uploaded.digest] = uploaded
+                if len(self.uploads) > self.uploads_max:
+                    self.uploads.popitem(last=False)
+        return uploaded
+
+
     def get_download_url(self, event_url):
         URL = "{}/{}/downloadFile/{}".format(self.BASE_URL, self.token, event_url) 
         return URL
 
-    def _handle_reply(self, reply):
-        reply = reply.reply
+    def _encode_reply(self, reply):
         try:
-            reply = json.dumps(reply)
-        except TypeError:
-            raise ValueError("could not encode reply value {!r} to JSON".format(reply))
+            with self.tracer.span('serialize', recipient=reply.reply['to']):
+                data = reply.encode(self.codec)
+        except ENCODE_ERRORS:
+            raise ValueError("could not encode reply value {!r} to JSON".format(reply.reply))
         logger.debug('wraped reply successfully')
-        self._send_message(reply)
+        return data
+
+
+    def _schedule_reply(self, priority, key, reply):
+        try:
+            data = self._encode_reply(reply)
+        except ValueError as error:
+            future = Future()
+            future.set_exception(error)
+            return future
+        return self._schedule_payload(priority, key, data, reply.reply['to'])
+
+
+    def _schedule_payload(self, priority, key, data, recipient):
+        entry = self.outbox.append(recipient, data) if self.outbox else None
+        return self.sender.schedule(priority, key, self._send_payload, (data, recipient, entry))
+
 
+    def _send_payload(self, data, recipient, entry=None):
+        if entry == None:
+            return self._send_message(data, recipient)
+        entry.wait()
+        result = self._send_message(data, recipient)
+        if result[0]:
+            self.outbox.ack(entry)
+        return result
 
-    def _send_message(self, data):
+
+    def replay_outbox(self):
+        futures = []
+        after   = 0
+        while True:
+            entries = self.outbox.pending(after=after)
+            if not entries:
+                break
+            for entry in entries:
+                futures.append((entry, self.sender.schedule(BULK, entry.recipient, self._send_payload
+                                                           ,(entry.payload, entry.recipient, entry))))
+                after = entry.id
+        results = SendResults([(entry, future_result(future)) for (entry, future) in futures])
+        if futures:
+            logger.info('replayed outbox: %s', results)
+        return results
+
+
+    def send_replies(self, replies, ordered=False, priority=INTERACTIVE):
+        futures = []
+        for reply in replies:
+            if not is_reply(reply):
+                raise ValueError("unknown reply item {!r}".format(reply))
+            key = reply.reply['to'] if ordered else object()
+            futures.append((reply, self._schedule_reply(priority, key, reply)))
+        return SendResults([(reply, future_result(future)) for (reply, future) in futures])
+
+
+    def broadcast(self, template, recipients, priority=BULK, max_failures=100):
+        if not isinstance(template, ReplyTemplate):
+            template = ReplyTemplate(template)
+        tail    = template.tail(self.codec)
+        results = BroadcastResults(max_failures)
+        for recipient in recipients:
+            if type(recipient) == bytes:
+                recipient = recipient.decode('utf-8')
+            recipient = recipient.strip()
+            if not recipient:
+                continue
+            data   = b'{"to":' + self.codec.dumps(recipient) + tail
+            future = self._schedule_payload(priority, recipient, data, recipient)
+            results.sent += 1
+            future.add_done_callback(lambda future, recipient=recipient: results._add(recipient, future_result(future)))
+        results.wait()
+        log(logger, logging.INFO, 'broadcast finished', structured=self.structured_logging
+           ,recipients=results.sent, succeeded=results.succeeded, failed=results.failed)
+        return results
+
+
+    def _send_message(self, data, recipient=None):
+        throttle_count = 0
+        attempt        = 0
         while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire(recipient)
+            started = time.perf_counter()
             try:
-                result = self.send_message(data)
-                return result
+                with self.tracer.span('send', recipient=recipient):
+                    result = self.send_message(data)
             except Exception as error:
-                self._handle_send_retry(error)
+                self.metrics.send_time.observe(time.perf_counter() - started)
+                self.metrics.sends.inc(('error',))
+                self._handle_send_retry(error, attempt)
+                attempt += 1
+                continue
+            self.metrics.send_time.observe(time.perf_counter() - started)
+            self.metrics.sends.inc((str(result[1]),))
+            if not self.rate_limiter:
+                return result
+            if not self.rate_limiter.is_throttle(result):
+                self.rate_limiter.succeeded()
+                return result
+            self.rate_limiter.throttled()
+            if throttle_count == self.rate_limiter.max_retries:
+                logger.error('giving up sending message to %r after %d throttled attempts', recipient, throttle_count + 1)
+                return result
+            time.sleep(self.rate_limiter.backoff(throttle_count))
+            throttle_count += 1
 
 
-    def _handle_send_retry(self, exception):
-        if not self.send_retry_max:
-            raise exception
-        elif self.send_retry_max == self.send_retry_count:
-            logger.debug('reached max \'send\' retry')
-            raise exception
-        elif self.send_retry_max > 0:
-            self.send_retry_count += 1
+    def _handle_send_retry(self, exception, attempt):
+        self.send_retry_policy.retry(exception, attempt)
 
 
     def send_message(self, data):
         URI = "{}/{}/sendMessage".format(self.BASE_URL, self.token)
         headers = {'Content-Type': 'application/json', 'Accept':'application/json'}
         if self.request_timeout:
-            req = requests.post(URI, headers=headers, timeout=self.request_timeout, data=data)
+            req = self.pool.post(URI, headers=headers, timeout=self.request_timeout, data=data)
         else:
-            req = requests.post(URI, headers=headers, data=data)
+            req = self.pool.post(URI, headers=headers, data=data)
         if req.status_code == 200:
-            response = req.text
-            logger.debug('got send response {!r}'.format(response))
+            response = req.content
+            logger.debug('got send response %r', response)
             req.close()
-            if response.startswith('{'):
-                try:
-                    response = json.loads(response)
-                    status_code = response['resultCode']
-                    if status_code == 200:
-                        logger.info('sent message successfully')
-                        return (True, 200, None)
-                    message = response['resultMessage']
-                    logger.error('could not send message because {!r}'.format(message))
-                    return (False, status_code, message)
-                except KeyError or json.decoder.JSONDecodeError:
-                    logger.error('got error {!r} for send operation'.format(req.text))
-                    return (False, req.status_code, 'unknown response {!r}'.format(req.text))
+            try:
+                response = self.codec.loads(response)
+                status_code = response['resultCode']
+                if status_code == 200:
+                    log(logger, logging.INFO, 'sent message successfully', structured=self.structured_logging)
+                    return (True, 200, None)
+                message = response['resultMessage']
+                logger.error('could not send message because %r', message)
+                return (False, status_code, message)
+            except (KeyError, TypeError) + DECODE_ERRORS:
+                logger.error('got error %r for send operation', req.text)
+                return (False, req.status_code, 'unknown response {!r}'.format(req.text))
         else:
-            logger.error('got HTTP status code {!r} for send operation'.format(req.status_code))
+            logger.error('got HTTP status code %r for send operation', req.status_code)
             return (False, req.status_code, 'unknown response {!r}'.format(req.text))
 
 
+    def pool_stats(self):
+        return self.pool.stats()
+
+
+    def send_stats(self):
+        return self.sender.stats()
+
+
+    def close(self):
+        if self.dispatcher:
+            self.dispatcher.shutdown()
+        self.sender.shutdown()
+        self.downloads.shutdown()
+        if self.outbox:
+            self.outbox.close()
+        self.sessions.close()
+        self.metrics.registry.close()
+        self.pool.close()
+
+
     def handle_event(self, event):
         pass
@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from os.path import join, exists, getsize
+from shutil import copyfile
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_key(key):
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _hash_file(filename, chunk_size=1048576):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as fd:
+        chunk = fd.read(chunk_size)
+        while chunk:
+            digest.update(chunk)
+            chunk = fd.read(chunk_size)
+    return digest.hexdigest()
+
+
+class FileCache:
+
+    def __init__(self, directory, max_size=1073741824, ttl=0, hardlink=False):
+        self.directory  = directory
+        self.max_size   = max_size
+        self.ttl        = ttl
+        self.hardlink   = hardlink
+        self.blobs_path = join(directory, 'blobs')
+        self.keys_path  = join(directory, 'keys')
+        self.size       = 0
+        self.hits       = 0
+        self.misses     = 0
+        self._blobs     = OrderedDict()
+        self._keys      = {}
+        self._lock      = threading.Lock()
+        os.makedirs(self.blobs_path, exist_ok=True)
+        os.makedirs(self.keys_path, exist_ok=True)
+        self._load()
+
+
+    def _load(self):
+        blobs = []
+        for name in os.listdir(self.blobs_path):
+            if '.' in name:
+                os.remove(join(self.blobs_path, name))
+                continue
+            stat = os.stat(join(self.blobs_path, name))
+            blobs.append((stat.st_mtime, name, stat.st_size))
+        for (_, name, size) in sorted(blobs):
+            self._blobs[name] = size
+            self.size += size
+        for name in os.listdir(self.keys_path):
+            filename = join(self.keys_path, name)
+            with open(filename) as fd:
+                blob = fd.read().strip()
+            if blob in self._blobs:
+                self._keys[name] = (blob, os.stat(filename).st_mtime)
+            else:
+                os.remove(filename)
+
+
+    def _lookup(self, key):
+        key   = _hash_key(key)
+        entry = self._keys.get(key)
+        if entry == None:
+            return None
+        (blob, stored) = entry
+        if self.ttl and time.time() - stored > self.ttl:
+            self._remove_key(key)
+            return None
+        if blob not in self._blobs:
+            self._remove_key(key)
+            return None
+        self._blobs.move_to_end(blob)
+        return blob
+
+
+    def get(self, key, filename):
+        with self._lock:
+            blob = self._lookup(key)
+            if blob == None:
+                self.misses += 1
+                return False
+            self.hits += 1
+        blob_name = join(self.blobs_path, blob)
+        try:
+            os.utime(blob_name)
+            self._place(blob_name, filename)
+        except FileNotFoundError:
+            with self._lock:
+                self._drop_blob(blob)
+            return False
+        logger.debug('served %r from cache blob %s', filename, blob)
+        return True
+
+
+    def _place(self, blob_name, filename):
+        temporary = '{}.cache-{}'.format(filename, threading.get_ident())
+        if self.hardlink and not os.stat(blob_name).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+            try:
+                os.link(blob_name, temporary)
+                os.replace(temporary, filename)
+                return
+            except OSError:
+                pass
+        copyfile(blob_name, temporary)
+        os.replace(temporary, filename)
+
+
+    def _store(self, filename, blob_name):
+        temporary = '{}.{}'.format(blob_name, threading.get_ident())
+        copyfile(filename, temporary)
+        os.chmod(temporary, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(temporary, blob_name)
+
+
+    def put(self, key, filename):
+        blob      = _hash_file(filename)
+        blob_name = join(self.blobs_path, blob)
+        size      = getsize(filename)
+        if not exists(blob_name):
+            self._store(filename, blob_name)
+        with self._lock:
+            if blob not in self._blobs:
+                self._blobs[blob] = size
+                self.size += size
+            self._blobs.move_to_end(blob)
+            key = _hash_key(key)
+            with open(join(self.keys_path, key), 'w') as fd:
+                fd.write(blob)
+            self._keys[key] = (blob, time.time())
+            self._evict()
+        return blob
+
+
+    def _evict(self):
+        while self.size > self.max_size and self._blobs:
+            (blob, _) = next(iter(self._blobs.items()))
+            self._drop_blob(blob)
+
+
+    def _drop_blob(self, blob):
+        size = self._blobs.pop(blob, None)
+        if size == None:
+            return
+        self.size -= size
+        try:
+            os.remove(join(self.blobs_path, blob))
+        except FileNotFoundError:
+            pass
+        for key in [key for (key, (key_blob, _)) in self._keys.items() if key_blob == blob]:
+            self._remove_key(key)
+
+
+    def _remove_key(self, key):
+        self._keys.pop(key, None)
+        try:
+            os.remove(join(self.keys_path, key))
+        except FileNotFoundError:
+            pass
+
+
+    def stats(self):
+        return {'size'  : self.size
+               ,'blobs' : len(self._blobs)
+               ,'keys'  : len(self._keys)
+               ,'hits'  : self.hits
+               ,'misses': self.misses}
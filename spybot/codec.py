@@ -0,0 +1,81 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+ENCODE_ERRORS = (TypeError, ValueError, OverflowError)
+DECODE_ERRORS = (ValueError,)
+
+
+class JSONCodec:
+
+    name = 'json'
+
+    def dumps(self, value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson == None:
+            raise ImportError('codec \'orjson\' needs package \'orjson\'')
+
+
+    def dumps(self, value):
+        return orjson.dumps(value)
+
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec:
+
+    name = 'ujson'
+
+    def __init__(self):
+        if ujson == None:
+            raise ImportError('codec \'ujson\' needs package \'ujson\'')
+
+
+    def dumps(self, value):
+        return ujson.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+CODECS = {JSONCodec.name  : JSONCodec
+         ,OrjsonCodec.name: OrjsonCodec
+         ,UjsonCodec.name : UjsonCodec}
+
+
+def get_codec(codec=None):
+    if codec == None:
+        if orjson != None:
+            return OrjsonCodec()
+        if ujson != None:
+            return UjsonCodec()
+        return JSONCodec()
+    if type(codec) == str:
+        try:
+            return CODECS[codec]()
+        except KeyError:
+            raise ValueError('unknown codec {!r}, available codecs are {!r}'.format(codec, list(CODECS)))
+    return codec
@@ -0,0 +1,63 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+
+logger = logging.getLogger(__name__)
+
+
+class SerialExecutor:
+
+    def __init__(self, workers, max_pending=0):
+        self.workers     = workers
+        self.max_pending = max_pending if max_pending else workers * 64
+        self.executor    = ThreadPoolExecutor(max_workers=workers)
+        self._lock       = threading.Lock()
+        self._queues     = {}
+        self._pending    = threading.BoundedSemaphore(self.max_pending)
+
+
+    def submit(self, key, function, *args, **kwargs):
+        self._pending.acquire()
+        future = Future()
+        item = (future, function, args, kwargs)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue != None:
+                queue.append(item)
+                return future
+            self._queues[key] = deque([item])
+        self.executor.submit(self._run_next, key)
+        return future
+
+
+    def _run_next(self, key):
+        with self._lock:
+            (future, function, args, kwargs) = self._queues[key][0]
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(function(*args, **kwargs))
+            except BaseException as error:
+                future.set_exception(error)
+        self._pending.release()
+        with self._lock:
+            queue = self._queues[key]
+            queue.popleft()
+            if not queue:
+                del self._queues[key]
+                return
+        self.executor.submit(self._run_next, key)
+
+
+    def pending(self):
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+
+    def shutdown(self, wait=True):
+        if wait:
+            for _ in range(self.max_pending):
+                self._pending.acquire()
+            for _ in range(self.max_pending):
+                self._pending.release()
+        self.executor.shutdown(wait=wait)
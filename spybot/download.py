@@ -0,0 +1,161 @@
+import threading
+import time
+from shutil import copyfile
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from spybot.utils import wrap_strings
+
+
+class DownloadProgress:
+
+    __slots__ = ('url', 'path', 'total', 'received', 'offset', 'started', 'finished')
+
+    def __init__(self, url, path=None, offset=0):
+        self.url      = url
+        self.path     = path
+        self.total    = None
+        self.received = 0
+        self.offset   = offset
+        self.started  = time.monotonic()
+        self.finished = None
+
+
+    @property
+    def size(self):
+        return self.offset + self.received
+
+
+    @property
+    def elapsed(self):
+        return (self.finished if self.finished != None else time.monotonic()) - self.started
+
+
+    @property
+    def throughput(self):
+        elapsed = self.elapsed
+        if not elapsed:
+            return 0.0
+        return self.received / elapsed
+
+
+    @property
+    def percent(self):
+        if not self.total:
+            return None
+        return 100.0 * self.size / self.total
+
+
+    def __str__(self):
+        return wrap_strings([('path', self.path)
+                            ,('size', self.size, 'B')
+                            ,('total', self.total, 'B')
+                            ,('resumed-from', self.offset, 'B')
+                            ,('throughput', int(self.throughput), 'B/s')]
+                           ,separator=', '
+                           ,equal=' -> ')
+
+
+class DownloadStream:
+
+    def __init__(self, response, progress, chunk_size=65536):
+        self.response   = response
+        self.progress   = progress
+        self.chunk_size = chunk_size
+
+
+    def __iter__(self):
+        try:
+            for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+                self.progress.received += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+
+    def read(self, size=-1):
+        if size == None or size < 0:
+            data = b''.join(self)
+            return data
+        data = self.response.raw.read(size, decode_content=True)
+        self.progress.received += len(data)
+        return data
+
+
+    def close(self):
+        if self.progress.finished == None:
+            self.progress.finished = time.monotonic()
+        self.response.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def total_size(response, offset):
+    content_range = response.headers.get('Content-Range')
+    if content_range and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+class DownloadManager:
+
+    def __init__(self, bot, max_concurrency=4):
+        self.bot             = bot
+        self.max_concurrency = max_concurrency
+        self.executor        = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._lock           = threading.Lock()
+        self._inflight       = {}
+
+
+    def submit(self, target, filename, **kwargs):
+        URL = self.bot._file_url(target)
+        with self._lock:
+            entry = self._inflight.get(URL)
+            if entry != None:
+                (first_filename, future) = entry
+                if first_filename == filename:
+                    return future
+                return self._copy_when_done(future, filename)
+            future = self.executor.submit(self._download, URL, filename, kwargs)
+            self._inflight[URL] = (filename, future)
+        return future
+
+
+    def _download(self, URL, filename, kwargs):
+        try:
+            return self.bot.download_file(URL, filename, **kwargs)
+        finally:
+            with self._lock:
+                self._inflight.pop(URL, None)
+
+
+    def _copy_when_done(self, future, filename):
+        copy_future = Future()
+        def copy(future):
+            try:
+                progress = future.result()
+                copyfile(progress.path, filename)
+                copy_future.set_result(progress)
+            except BaseException as error:
+                copy_future.set_exception(error)
+        future.add_done_callback(copy)
+        return copy_future
+
+
+    def pending(self):
+        with self._lock:
+            return len(self._inflight)
+
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
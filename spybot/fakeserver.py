@@ -0,0 +1,270 @@
+import json
+import logging
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+logger = logging.getLogger(__name__)
+
+EVENT_MIX = {'TEXT'        : 70
+            ,'IMAGE'       : 8
+            ,'GIF'         : 2
+            ,'VIDEO'       : 4
+            ,'PUSH_TO_TALK': 4
+            ,'ATTACHMENT'  : 4
+            ,'LOCATION'    : 4
+            ,'START'       : 2
+            ,'STOP'        : 2}
+
+
+class _Server(ThreadingHTTPServer):
+
+    request_queue_size = 1024
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+class FakeServer:
+
+    def __init__(self
+                ,host          = '127.0.0.1'
+                ,port          = 0
+                ,events        = 1000
+                ,rate          = 0
+                ,mix           = None
+                ,senders       = 100
+                ,file_size     = 65536
+                ,latency       = 0.0
+                ,error_rate    = 0.0
+                ,throttle_rate = 0.0
+                ,seed          = None):
+        self.events        = events
+        self.rate          = rate
+        self.mix           = mix if mix != None else EVENT_MIX
+        self.senders       = senders
+        self.latency       = latency
+        self.error_rate    = error_rate
+        self.throttle_rate = throttle_rate
+        self.random        = random.Random(seed)
+        self.file          = bytes(self.random.getrandbits(8) for _ in range(file_size))
+        self.emitted       = {}
+        self.latencies     = []
+        self.received      = 0
+        self.failed        = 0
+        self.throttled     = 0
+        self.downloads     = 0
+        self.uploads       = 0
+        self._sequence     = 0
+        self._lock         = threading.Lock()
+        self._replied      = threading.Condition(self._lock)
+        self.httpd         = _Server((host, port), _handler(self))
+        self.httpd.daemon_threads = True
+        self._thread       = None
+
+
+    @property
+    def url(self):
+        (host, port) = self.httpd.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='spybot-fakeserver', daemon=True)
+        self._thread.start()
+        logger.info('fake server listening on %s', self.url)
+        return self
+
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *_):
+        self.stop()
+
+
+    def make_event(self):
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+            self.emitted[sequence] = time.perf_counter()
+        (kind,) = self.random.choices(list(self.mix), weights=list(self.mix.values()))
+        event = {'from': 'user{}'.format(self.random.randrange(self.senders)), 'time': sequence}
+        if kind == 'TEXT':
+            event.update(type='TEXT', body='message {}'.format(sequence))
+        elif kind == 'LOCATION':
+            event.update(type='LOCATION', latitude=35.7, longitude=51.4)
+        elif kind in ('START', 'STOP'):
+            event.update(type=kind)
+        else:
+            event.update(type='FILE', fileType=kind, fileUrl='file-{}'.format(sequence), fileName='file-{}'.format(sequence)
+                        ,fileSize=len(self.file), fileDuration=1000, thumbnailUrl='thumbnail-{}'.format(sequence)
+                        ,imageWidth=640, imageHeight=480, thumbnailWidth=64, thumbnailHeight=48)
+        return event
+
+
+    def record_reply(self, reply):
+        now = time.perf_counter()
+        with self._lock:
+            self.received += 1
+            body = reply.get('body') if type(reply) == dict else None
+            if type(body) == str and body.isdigit():
+                emitted = self.emitted.pop(int(body), None)
+                if emitted != None:
+                    self.latencies.append(now - emitted)
+            self._replied.notify_all()
+
+
+    def wait_replies(self, count, timeout=None):
+        with self._replied:
+            return self._replied.wait_for(lambda: self.received >= count, timeout)
+
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self.latencies)
+        return {'emitted'  : self._sequence
+               ,'received' : self.received
+               ,'failed'   : self.failed
+               ,'throttled': self.throttled
+               ,'downloads': self.downloads
+               ,'uploads'  : self.uploads
+               ,'p50'      : _percentile(latencies, 50)
+               ,'p99'      : _percentile(latencies, 99)}
+
+
+def _handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version        = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, *_):
+            pass
+
+
+        def _respond(self, status, body, content_type='application/json', headers=()):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for (name, value) in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+
+        def _result(self, code, message, **fields):
+            fields.update(resultCode=code, resultMessage=message)
+            self._respond(200, json.dumps(fields).encode('utf-8'))
+
+
+        def do_GET(self):
+            if self.path.endswith('/getMessage'):
+                return self._stream()
+            if '/downloadFile/' in self.path:
+                return self._download()
+            self._respond(404, b'')
+
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if server.latency:
+                time.sleep(server.latency)
+            if server.error_rate and server.random.random() < server.error_rate:
+                with server._lock:
+                    server.failed += 1
+                return self._respond(500, b'internal error', 'text/plain')
+            if self.path.endswith('/uploadFile'):
+                with server._lock:
+                    server.uploads += 1
+                    upload = server.uploads
+                return self._result(200, 'OK', fileUrl='upload-{}'.format(upload))
+            if not self.path.endswith('/sendMessage'):
+                return self._respond(404, b'')
+            if server.throttle_rate and server.random.random() < server.throttle_rate:
+                with server._lock:
+                    server.throttled += 1
+                return self._result(429, 'Too many requests')
+            try:
+                reply = json.loads(body.decode('utf-8'))
+            except ValueError:
+                return self._result(400, 'Bad request')
+            server.record_reply(reply)
+            self._result(200, 'OK')
+
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            interval = 1.0 / server.rate if server.rate else 0
+            started  = time.perf_counter()
+            for index in range(server.events):
+                if interval:
+                    delay = started + index * interval - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                data = json.dumps(server.make_event()).encode('utf-8')
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+
+
+        def _download(self):
+            if server.latency:
+                time.sleep(server.latency)
+            data  = server.file
+            start = 0
+            rng   = self.headers.get('Range')
+            with server._lock:
+                server.downloads += 1
+            if rng and rng.startswith('bytes='):
+                start = int(rng[6:].split('-')[0] or 0)
+                if start >= len(data):
+                    return self._respond(416, b'', 'application/octet-stream')
+                return self._respond(206, data[start:], 'application/octet-stream'
+                                    ,[('Content-Range', 'bytes {}-{}/{}'.format(start, len(data) - 1, len(data)))])
+            self._respond(200, data, 'application/octet-stream')
+
+    return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Local stand-in for the Soroush bot API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--events', type=int, default=1000, help='events per getMessage stream')
+    parser.add_argument('--rate', type=float, default=0, help='events per second, 0 for no limit')
+    parser.add_argument('--senders', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every POST and download')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of POSTs answered with HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of sends answered with code 429')
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = FakeServer(arguments.host
+                       ,arguments.port
+                       ,events=arguments.events
+                       ,rate=arguments.rate
+                       ,senders=arguments.senders
+                       ,latency=arguments.latency
+                       ,error_rate=arguments.error_rate
+                       ,throttle_rate=arguments.throttle_rate)
+    logger.info('fake server listening on %s', server.url)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,181 @@
+import threading
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_string(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, _escape(value)) for (name, value) in pairs) + '}'
+
+
+class Counter:
+
+    type = 'counter'
+
+    def __init__(self, name, help='', labels=()):
+        self.name    = name
+        self.help    = help
+        self.labels  = tuple(labels)
+        self._values = {}
+        self._lock   = threading.Lock()
+
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+
+    def exposition(self):
+        return ['{}{} {}'.format(self.name, _label_string(self.labels, labels), value)
+                for (labels, value) in sorted(self.collect().items())]
+
+
+class Histogram:
+
+    type = 'histogram'
+
+    def __init__(self, name, help='', labels=(), buckets=DEFAULT_BUCKETS):
+        self.name    = name
+        self.help    = help
+        self.labels  = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock   = threading.Lock()
+
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry == None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+
+    def collect(self):
+        with self._lock:
+            return dict((labels, {'buckets': list(counts), 'sum': total, 'count': count})
+                        for (labels, (counts, total, count)) in self._values.items())
+
+
+    def exposition(self):
+        lines = []
+        for (labels, value) in sorted(self.collect().items()):
+            cumulative = 0
+            for (bound, count) in zip(self.buckets + ('+Inf',), value['buckets']):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(self.name, _label_string(self.labels, labels, [('le', bound)]), cumulative))
+            lines.append('{}_sum{} {}'.format(self.name, _label_string(self.labels, labels), value['sum']))
+            lines.append('{}_count{} {}'.format(self.name, _label_string(self.labels, labels), value['count']))
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock   = threading.Lock()
+        self.server  = None
+
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing != None:
+                if type(existing) != type(metric) or existing.labels != metric.labels:
+                    raise ValueError('metric {!r} is already registered with another type or labels'.format(metric.name))
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+
+    def counter(self, name, help='', labels=()):
+        return self._register(Counter(name, help, labels))
+
+
+    def histogram(self, name, help='', labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+
+    def collect(self):
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return dict((metric.name, metric.collect()) for metric in metrics)
+
+
+    def exposition(self):
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append('# HELP {} {}'.format(metric.name, metric.help))
+            lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+            lines.extend(metric.exposition())
+        return '\n'.join(lines) + '\n'
+
+
+    def serve(self, port=9090, host='127.0.0.1'):
+        registry = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_):
+                pass
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = registry.exposition().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='spybot-metrics', daemon=True).start()
+        return self.server
+
+
+    def close(self):
+        if self.server != None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class BotMetrics:
+
+    def __init__(self, registry=None):
+        self.registry       = registry if registry != None else Registry()
+        self.events         = self.registry.counter('spybot_events_total', 'Events parsed from the message stream'
+                                                   ,('type', 'file_type'))
+        self.parse_failures = self.registry.counter('spybot_parse_failures_total', 'Stream frames that could not be used'
+                                                   ,('reason',))
+        self.handler_time   = self.registry.histogram('spybot_handler_seconds'
+                                                     ,'Time spent in the event handler call, without sending its replies')
+        self.sends          = self.registry.counter('spybot_sends_total', 'Send attempts by API result code'
+                                                   ,('code',))
+        self.send_time      = self.registry.histogram('spybot_send_seconds', 'Duration of a single sendMessage request')
+        self.reconnects     = self.registry.counter('spybot_stream_reconnects_total', 'Message stream reconnects')
+        self.download_bytes = self.registry.counter('spybot_download_bytes_total', 'Bytes received by file downloads')
@@ -0,0 +1,146 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class OutboxEntry:
+
+    __slots__ = ('id', 'recipient', 'payload', 'attempts', 'error', '_committed')
+
+    def __init__(self, recipient, payload, id=None, attempts=0):
+        self.id         = id
+        self.recipient  = recipient
+        self.payload    = payload
+        self.attempts   = attempts
+        self.error      = None
+        self._committed = threading.Event()
+        if id != None:
+            self._committed.set()
+
+
+    def wait(self, timeout=None):
+        if not self._committed.wait(timeout):
+            raise TimeoutError('outbox entry for {!r} is not committed after {}s'.format(self.recipient, timeout))
+        if self.error != None:
+            raise self.error
+        return self
+
+
+class Outbox:
+
+    def __init__(self
+                ,path
+                ,max_buffer     = 1024
+                ,batch_size     = 256
+                ,flush_interval = 0.005
+                ,max_replays    = 5
+                ,synchronous    = 'FULL'):
+        self.path           = path
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+        self.max_replays    = max_replays
+        self._queue         = queue.Queue(maxsize=max_buffer)
+        self._lock          = threading.Lock()
+        self._db            = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous={}'.format(synchronous))
+        self._db.execute('CREATE TABLE IF NOT EXISTS outbox ('
+                         'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                         'recipient TEXT, '
+                         'payload BLOB NOT NULL, '
+                         'attempts INTEGER NOT NULL DEFAULT 0, '
+                         'created REAL NOT NULL)')
+        self._writer        = threading.Thread(target=self._write_loop, name='spybot-outbox', daemon=True)
+        self._writer.start()
+
+
+    def append(self, recipient, payload):
+        entry = OutboxEntry(recipient, payload)
+        self._queue.put(entry)
+        return entry
+
+
+    def ack(self, entry):
+        if entry.id != None:
+            self._queue.put(entry.id)
+
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit([item for item in batch if item is not _STOP])
+            if batch[-1] is _STOP:
+                return
+
+
+    def _commit(self, batch):
+        if not batch:
+            return
+        entries = [item for item in batch if type(item) == OutboxEntry]
+        acks    = [(item,) for item in batch if type(item) == int]
+        now     = time.time()
+        try:
+            with self._lock:
+                self._db.execute('BEGIN')
+                for entry in entries:
+                    cursor = self._db.execute('INSERT INTO outbox (recipient, payload, attempts, created) VALUES (?, ?, 0, ?)'
+                                             ,(entry.recipient, entry.payload, now))
+                    entry.id = cursor.lastrowid
+                if acks:
+                    self._db.executemany('DELETE FROM outbox WHERE id = ?', acks)
+                self._db.execute('COMMIT')
+        except sqlite3.Error as error:
+            logger.error('could not commit %d outbox entries: %r', len(batch), error)
+            with self._lock:
+                if self._db.in_transaction:
+                    self._db.execute('ROLLBACK')
+            for entry in entries:
+                entry.id    = None
+                entry.error = error
+        for entry in entries:
+            entry._committed.set()
+
+
+    def pending(self, limit=1000, after=0):
+        with self._lock:
+            self._db.execute('BEGIN')
+            dropped = self._db.execute('SELECT id, recipient FROM outbox WHERE attempts >= ?', (self.max_replays,)).fetchall()
+            if dropped:
+                self._db.execute('DELETE FROM outbox WHERE attempts >= ?', (self.max_replays,))
+            rows = self._db.execute('SELECT id, recipient, payload, attempts FROM outbox WHERE id > ? ORDER BY id LIMIT ?'
+                                   ,(after, limit)).fetchall()
+            self._db.executemany('UPDATE outbox SET attempts = attempts + 1 WHERE id = ?', [(row[0],) for row in rows])
+            self._db.execute('COMMIT')
+        for (id, recipient) in dropped:
+            logger.error('dropped outbox entry %d for %r after %d replays', id, recipient, self.max_replays)
+        return [OutboxEntry(recipient, payload, id, attempts + 1) for (id, recipient, payload, attempts) in rows]
+
+
+    def depth(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+
+    def buffered(self):
+        return self._queue.qsize()
+
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self._lock:
+            self._db.close()
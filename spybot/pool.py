@@ -0,0 +1,66 @@
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+
+    def __init__(self
+                ,pool_connections = 4
+                ,pool_maxsize     = 10
+                ,pool_block       = False
+                ,keep_alive       = True):
+        self.pool_connections = pool_connections
+        self.pool_maxsize     = pool_maxsize
+        self.pool_block       = pool_block
+        self.keep_alive       = keep_alive
+        self.adapter          = HTTPAdapter(pool_connections=pool_connections
+                                           ,pool_maxsize=pool_maxsize
+                                           ,pool_block=pool_block)
+        self.session          = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+
+    def post(self, url, **kwargs):
+        return self.session.post(url, **kwargs)
+
+
+    def stats(self):
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        with pools.lock:
+            keys = list(pools.keys())
+        for key in keys:
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            hosts['{}://{}:{}'.format(key.key_scheme, key.key_host, key.key_port)] = \
+                {'connections': pool.num_connections
+                ,'requests'   : pool.num_requests
+                ,'reused'     : max(pool.num_requests - pool.num_connections, 0)
+                ,'idle'       : self._idle_count(pool)}
+        return {'connections': sum(host['connections'] for host in hosts.values())
+               ,'requests'   : sum(host['requests'] for host in hosts.values())
+               ,'reused'     : sum(host['reused'] for host in hosts.values())
+               ,'hosts'      : hosts}
+
+
+    def _idle_count(self, pool):
+        if not pool.pool:
+            return 0
+        return len([connection for connection in list(pool.pool.queue) if connection != None])
+
+
+    def close(self):
+        self.session.close()
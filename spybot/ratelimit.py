@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'timestamp')
+
+    def __init__(self, rate, burst=None):
+        self.rate      = float(rate)
+        self.capacity  = float(burst if burst else max(rate, 1))
+        self.tokens    = self.capacity
+        self.timestamp = time.monotonic()
+
+
+    def reserve(self, now):
+        self.tokens    = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+        self.timestamp = now
+        self.tokens   -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class RateLimiter:
+
+    THROTTLE_CODES = (429,)
+
+    def __init__(self
+                ,rate                = 0
+                ,burst               = None
+                ,per_recipient_rate  = 0
+                ,per_recipient_burst = None
+                ,min_rate            = 1
+                ,recovery_step       = 0.5
+                ,throttle_codes      = None
+                ,max_retries         = 5
+                ,max_recipients      = 10000):
+        self.max_rate            = rate
+        self.burst               = burst
+        self.per_recipient_rate  = per_recipient_rate
+        self.per_recipient_burst = per_recipient_burst
+        self.min_rate            = min_rate
+        self.recovery_step       = recovery_step
+        self.throttle_codes      = tuple(throttle_codes) if throttle_codes != None else self.THROTTLE_CODES
+        self.max_retries         = max_retries
+        self.max_recipients      = max_recipients
+        self.bucket              = TokenBucket(rate, burst) if rate else None
+        self.recipients          = OrderedDict()
+        self.throttle_count      = 0
+        self._waiting            = 0
+        self._lock               = threading.Lock()
+
+
+    @property
+    def rate(self):
+        if self.bucket == None:
+            return 0
+        return self.bucket.rate
+
+
+    def reserve(self, recipient=None):
+        now = time.monotonic()
+        with self._lock:
+            delay = self.bucket.reserve(now) if self.bucket != None else 0.0
+            if self.per_recipient_rate and recipient != None:
+                bucket = self.recipients.get(recipient)
+                if bucket == None:
+                    bucket = TokenBucket(self.per_recipient_rate, self.per_recipient_burst)
+                    self.recipients[recipient] = bucket
+                    if len(self.recipients) > self.max_recipients:
+                        self.recipients.popitem(last=False)
+                else:
+                    self.recipients.move_to_end(recipient)
+                delay = max(delay, bucket.reserve(now))
+        return delay
+
+
+    def acquire(self, recipient=None):
+        delay = self.reserve(recipient)
+        if delay:
+            with self._lock:
+                self._waiting += 1
+            try:
+                time.sleep(delay)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+
+
+    async def acquire_async(self, recipient=None):
+        delay = self.reserve(recipient)
+        if delay:
+            self._waiting += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._waiting -= 1
+
+
+    def is_throttle(self, result):
+        (_, status_code, _) = result
+        if type(status_code) != int:
+            return False
+        return status_code in self.throttle_codes or 500 <= status_code < 600
+
+
+    def throttled(self):
+        with self._lock:
+            self.throttle_count += 1
+            if self.bucket == None:
+                return
+            rate = max(self.min_rate, self.bucket.rate / 2)
+            if rate != self.bucket.rate:
+                logger.warning('got throttled, lowering send rate to %.2f/s', rate)
+            self.bucket.rate = rate
+
+
+    def backoff(self, attempt):
+        return min(0.1 * 2 ** attempt, 5.0)
+
+
+    def succeeded(self):
+        if self.bucket == None or self.bucket.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.recovery_step)
+
+
+    def queue_depth(self):
+        return self._waiting
+
+
+    def stats(self):
+        return {'rate'       : self.rate
+               ,'max_rate'   : self.max_rate
+               ,'queue_depth': self._waiting
+               ,'throttled'  : self.throttle_count
+               ,'recipients' : len(self.recipients)}
@@ -24,53 +24,87 @@ FILE_TYPES             = [IMAGE_FILE_TYPE
 
 
 def is_reply(reply):
-    if type(reply) in (Text
-                      ,Gif
-                      ,Video
-                      ,PushToTalk
-                      ,Attachment
-                      ,Location
-                      ,Contact
-                      ,KeyboardChange):
-        return True
-    return False
+    return isinstance(reply, _Reply)
+
+
+def transform_keyboard(keyboard):
+    fixed_keyboard = []
+    for row_count in range(1, len(keyboard) + 1):
+        columns = keyboard[row_count]
+        fixed_keyboard.append([{'command': columns[column_count][0], 'text': columns[column_count][1]}
+                               for column_count in range(1, len(columns) + 1)])
+    return fixed_keyboard
+
+
+def _codec_key(codec):
+    return getattr(codec, 'name', None) or type(codec)
+
+
+class Keyboard:
+
+    def __init__(self, keyboard):
+        self.keyboard = transform_keyboard(keyboard)
+        self._encoded = {}
+
+
+    def encode(self, codec):
+        key = _codec_key(codec)
+        encoded = self._encoded.get(key)
+        if encoded == None:
+            encoded = codec.dumps(self.keyboard)
+            self._encoded[key] = encoded
+        return encoded
+
+
+def _splice(encoded, key, value):
+    if encoded == b'{}':
+        return b'{"' + key + b'":' + value + b'}'
+    return encoded[:-1] + b',"' + key + b'":' + value + b'}'
 
 
 class _Reply:
 
     def __init__(self, to, reply_type, keyboard=None):
-        self.reply = {'to': to, 'type': reply_type}
-        self.type  = reply_type
-        if keyboard != None:
+        self.reply     = {'to': to, 'type': reply_type}
+        self.type      = reply_type
+        self._keyboard = None
+        if isinstance(keyboard, Keyboard):
+            self.reply['keyboard'] = keyboard.keyboard
+            self._keyboard         = keyboard
+        elif keyboard != None:
             self.reply['keyboard'] = self._transform_keyboard(keyboard)
         self.string_separator = ', '
         self.string_equal     = ' -> '
+        self._string          = None
+
+
+    def encode(self, codec):
+        if self._keyboard == None:
+            return codec.dumps(self.reply)
+        reply = dict(self.reply)
+        del reply['keyboard']
+        return _splice(codec.dumps(reply), b'keyboard', self._keyboard.encode(codec))
 
 
     def __str__(self):
-        return wrap_strings([('type'     , self.type)
-                            ,('to'     , self.reply['to'])]
-                           ,separator=self.string_separator
-                           ,equal=self.string_equal)
-            
+        if self._string == None:
+            self._string = wrap_strings(self._items()
+                                       ,separator=self.string_separator
+                                       ,equal=self.string_equal)
+        return self._string
+
+
+    def _items(self):
+        return [('type'     , self.type)
+               ,('to'     , self.reply['to'])]
+
+
+    def as_dict(self):
+        return dict((item[0], item[1]) for item in self._items())
+
 
     def _transform_keyboard(self, keyboard):
-        fixed_keyboard = []
-        row_size = len(keyboard)
-        row_count = 1
-        while row_count <= row_size:
-            columns = keyboard[row_count]
-            column_size = len(columns)
-            column_count = 1
-            fixed_column = []
-            while column_count <= column_size:
-                key = columns[column_count]
-                (command, text) = key
-                fixed_column.append({'command': command, 'text': text})
-                column_count += 1
-            fixed_keyboard.append(fixed_column)
-            row_count += 1
-        return fixed_keyboard
+        return transform_keyboard(keyboard)
 
 
 class Text(_Reply):
@@ -80,12 +114,8 @@ class Text(_Reply):
         self.reply['body'] = body
 
 
-    def __str__(self):
-        string  = super().__str__()
-        string += self.string_separator + wrap_strings([('body', self.reply['body'])]
-                                                      ,separator=self.string_separator
-                                                      ,equal=self.string_equal)
-        return string
+    def _items(self):
+        return super()._items() + [('body', self.reply['body'])]
 
 
 class _File(_Reply):
@@ -106,18 +136,15 @@ class _File(_Reply):
         self.reply['fileSize'] = size
 
 
-    def __str__(self):
-        string   = super().__str__()
+    def _items(self):
         items    = [('media-type', self.reply['fileType'])
-                   ,('name', self.reply['fileNme'])
+                   ,('name', self.reply['fileName'])
                    ,('size', self.reply['fileSize'], "KB")
                    ,('URL', self.reply['fileUrl'])]
-        if self.body and self.body != ' ':
-            items.insert(2, ('body', self.file['body']))
-        string += self.string_separator + wrap_strings(items
-                                                      ,separator=self.string_separator
-                                                      ,equal=self.string_equal)
-        return string
+        body     = self.reply['body']
+        if body and body != ' ':
+            items.insert(2, ('body', body))
+        return super()._items() + items
 
 
 class Image(_File):
@@ -145,15 +172,10 @@ class Image(_File):
         self.reply['imageHeight']  = height
 
 
-    def __str__(self):
-        string   = super().__str__()
-        items    = [('width', self.reply['imageWidth'])
-                   ,('height', self.reply['imageHeight'])
-                   ,('thumbnail-URL', self.reply['thumbnailUrl'])]
-        string  += self.string_separator + wrap_strings(items
-                                                       ,separator=self.string_separator
-                                                       ,equal=self.string_equal)
-        return string
+    def _items(self):
+        return super()._items() + [('width', self.reply['imageWidth'])
+                                 ,('height', self.reply['imageHeight'])
+                                 ,('thumbnail-URL', self.reply['thumbnailUrl'])]
 
 
 class Gif(_File):
@@ -181,15 +203,10 @@ class Gif(_File):
         self.reply['imageHeight']  = height
 
 
-    def __str__(self):
-        string   = super().__str__()
-        items    = [('width', self.reply['imageWidth'])
-                   ,('height', self.reply['imageHeight'])
-                   ,('thumbnail-URL', self.reply['thumbnailUrl'])]
-        string  += self.string_separator + wrap_strings(items
-                                                       ,separator=self.string_separator
-                                                       ,equal=self.string_equal)
-        return string
+    def _items(self):
+        return super()._items() + [('width', self.reply['imageWidth'])
+                                 ,('height', self.reply['imageHeight'])
+                                 ,('thumbnail-URL', self.reply['thumbnailUrl'])]
 
 
 class Video(_File):
@@ -219,16 +236,11 @@ class Video(_File):
         self.reply['thumbnailHeight'] = height
 
 
-    def __str__(self):
-        string   = super().__str__()
-        items    = [('duration', self.reply['fileDuration'], 'ms')
-                   ,('thumbnail-width', self.reply['thumbnailWidth'])
-                   ,('thumbnail-height', self.reply['thumbnailHeight'])
-                   ,('thumbnail-URL', self.reply['thumbnailUrl'])]
-        string  += self.string_separator + wrap_strings(items
-                                                       ,separator=self.string_separator
-                                                       ,equal=self.string_equal)
-        return string
+    def _items(self):
+        return super()._items() + [('duration', self.reply['fileDuration'], 'ms')
+                                 ,('thumbnail-width', self.reply['thumbnailWidth'])
+                                 ,('thumbnail-height', self.reply['thumbnailHeight'])
+                                 ,('thumbnail-URL', self.reply['thumbnailUrl'])]
 
 
 class PushToTalk(_File):
@@ -252,13 +264,8 @@ class PushToTalk(_File):
         self.reply['fileDuration'] = duration
 
 
-    def __str__(self):
-        string   = super().__str__()
-        items    = [('duration', self.reply['fileDuration'], 'ms')]
-        string  += self.string_separator + wrap_strings(items
-                                                       ,separator=self.string_separator
-                                                       ,equal=self.string_equal)
-        return string
+    def _items(self):
+        return super()._items() + [('duration', self.reply['fileDuration'], 'ms')]
 
 
 class Attachment(_File):
@@ -282,14 +289,9 @@ class Location(_Reply):
         self.reply['longitude'] = longitude
 
 
-    def __str__(self):
-        string   = super().__str__()
-        items    = [('latitude', self.reply['latitude'])
-                   ,('longitude', self.reply['longitude'])]
-        string  += self.string_separator + wrap_strings(items
-                                                       ,separator=self.string_separator
-                                                       ,equal=self.string_equal)
-        return string
+    def _items(self):
+        return super()._items() + [('latitude', self.reply['latitude'])
+                                 ,('longitude', self.reply['longitude'])]
 
 
 class Contact(_Reply):
@@ -306,17 +308,81 @@ class Contact(_Reply):
         self.reply['phoneNo']   = phone_number
 
 
-    def __str__(self):
-        string   = super().__str__()
-        items    = [('nickname', self.reply['nickName'])
-                   ,('phone-number', self.reply['phoneNo'])
-                   ,('avatar-URL', self.reply['avatarlUrl'])]
-        string  += self.string_separator + wrap_strings(items
-                                                       ,separator=self.string_separator
-                                                       ,equal=self.string_equal)
-        return string
+    def _items(self):
+        return super()._items() + [('nickname', self.reply['nickName'])
+                                 ,('phone-number', self.reply['phoneNo'])
+                                 ,('avatar-URL', self.reply['avatarUrl'])]
 
 
 class KeyboardChange(_Reply):
     def __init__(self, to, keyboard):
         _Reply.__init__(self, to, KEYBOARD_CHANGE_TYPE, keyboard)
+
+
+class ReplyTemplate:
+
+    def __init__(self, prototype):
+        if not is_reply(prototype):
+            raise ValueError('unknown reply prototype {!r}'.format(prototype))
+        self.prototype = prototype
+        self.type      = prototype.type
+        self.body      = prototype.reply.get('body')
+        self._static   = {}
+
+
+    def render(self, to, body=None):
+        return TemplateReply(self, to, body)
+
+
+    def static(self, codec):
+        key = _codec_key(codec)
+        encoded = self._static.get(key)
+        if encoded == None:
+            reply = dict(self.prototype.reply)
+            for field in ('to', 'body', 'keyboard'):
+                reply.pop(field, None)
+            encoded = codec.dumps(reply)
+            if self.prototype._keyboard != None:
+                encoded = _splice(encoded, b'keyboard', self.prototype._keyboard.encode(codec))
+            elif 'keyboard' in self.prototype.reply:
+                encoded = _splice(encoded, b'keyboard', codec.dumps(self.prototype.reply['keyboard']))
+            self._static[key] = encoded
+        return encoded
+
+
+    def tail(self, codec, body=None):
+        if body == None:
+            body = self.body
+        tail = b','
+        if body != None:
+            tail += b'"body":' + codec.dumps(body) + b','
+        return tail + self.static(codec)[1:]
+
+
+    def encode(self, codec, to, body=None):
+        return b'{"to":' + codec.dumps(to) + self.tail(codec, body)
+
+
+class TemplateReply(_Reply):
+
+    def __init__(self, template, to, body=None):
+        self.template         = template
+        self.type             = template.type
+        self.reply            = {'to': to, 'type': template.type}
+        if body != None:
+            self.reply['body'] = body
+        self._keyboard        = None
+        self.string_separator = ', '
+        self.string_equal     = ' -> '
+        self._string          = None
+
+
+    def _items(self):
+        items = super()._items()
+        if 'body' in self.reply:
+            items.append(('body', self.reply['body']))
+        return items
+
+
+    def encode(self, codec):
+        return self.template.encode(codec, self.reply['to'], self.reply.get('body'))
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+
+    def __init__(self
+                ,max_retries = 0
+                ,base_delay  = 0.5
+                ,max_delay   = 30.0
+                ,multiplier  = 2.0
+                ,jitter      = 0.5
+                ,budget      = 0
+                ,window      = 60.0
+                ,name        = 'operation'):
+        self.max_retries = max_retries
+        self.base_delay  = base_delay
+        self.max_delay   = max_delay
+        self.multiplier  = multiplier
+        self.jitter      = jitter
+        self.budget      = budget
+        self.window      = window
+        self.name        = name
+        self._retries    = deque()
+        self._lock       = threading.Lock()
+
+
+    def delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        if self.jitter:
+            delay -= delay * self.jitter * random.random()
+        return delay
+
+
+    def _check(self, exception, attempt):
+        if not self.max_retries:
+            raise exception
+        if self.max_retries > 0 and attempt >= self.max_retries:
+            logger.debug('reached max %r retry', self.name)
+            raise exception
+        if self.budget:
+            now = time.monotonic()
+            with self._lock:
+                while self._retries and now - self._retries[0] > self.window:
+                    self._retries.popleft()
+                if len(self._retries) >= self.budget:
+                    logger.error('%r retry budget of %d retries per %ss is exhausted', self.name, self.budget, self.window)
+                    raise exception
+                self._retries.append(now)
+        delay = self.delay(attempt)
+        logger.warning('%r failed with %r, retrying in %.2fs (attempt %d)', self.name, exception, delay, attempt + 1)
+        return delay
+
+
+    def retry(self, exception, attempt):
+        time.sleep(self._check(exception, attempt))
+
+
+    async def retry_async(self, exception, attempt):
+        await asyncio.sleep(self._check(exception, attempt))
@@ -0,0 +1,163 @@
+import logging
+import re
+
+from spybot.event import TEXT_TYPE, FILE_TYPE
+from spybot.utils import argument_count
+
+logger = logging.getLogger(__name__)
+
+_HANDLER = object()
+
+
+class Route:
+
+    __slots__ = ('handler', 'arguments', 'pattern')
+
+    def __init__(self, handler, pattern=None):
+        self.handler   = handler
+        self.arguments = argument_count(handler)
+        self.pattern   = pattern
+        if self.arguments not in (1, 2, 3) and (self.arguments != 4 or pattern == None):
+            raise ValueError('route handler {!r} MUST accept one, two or three argument(s), or four for regex routes'.format(handler))
+
+
+    def __call__(self, bot, event, session):
+        if self.arguments == 1:
+            return self.handler(event)
+        if self.arguments == 2:
+            return self.handler(bot, event)
+        if self.pattern == None:
+            return self.handler(bot, event, session)
+        if self.arguments == 3:
+            return self.handler(bot, event, self.pattern.match(event.body))
+        return self.handler(bot, event, self.pattern.match(event.body), session)
+
+
+class Router:
+
+    def __init__(self, default=None):
+        self.default   = Route(default) if default != None else None
+        self._types    = {}
+        self._commands = {}
+        self._trie     = {}
+        self._patterns = []
+        self._regex    = None
+        self._groups   = {}
+
+
+    def _register(self, add, handler):
+        if handler != None:
+            add(handler)
+            return handler
+        def decorator(handler):
+            add(handler)
+            return handler
+        return decorator
+
+
+    def on(self, event_type, handler=None):
+        def add(handler):
+            self._types[event_type] = Route(handler)
+        return self._register(add, handler)
+
+
+    def command(self, command, handler=None):
+        def add(handler):
+            self._commands[command] = Route(handler)
+        return self._register(add, handler)
+
+
+    def prefix(self, prefix, handler=None):
+        def add(handler):
+            node = self._trie
+            for character in prefix:
+                node = node.setdefault(character, {})
+            node[_HANDLER] = Route(handler)
+        return self._register(add, handler)
+
+
+    def regex(self, pattern, handler=None, flags=0):
+        def add(handler):
+            compiled = re.compile(pattern, flags) if type(pattern) == str else pattern
+            patterns = self._patterns + [Route(handler, compiled)]
+            (self._regex, self._groups) = _combine(patterns)
+            self._patterns = patterns
+        return self._register(add, handler)
+
+
+    def _match_prefix(self, text):
+        route = None
+        node  = self._trie
+        for character in text:
+            node = node.get(character)
+            if node == None:
+                break
+            route = node.get(_HANDLER, route)
+        return route
+
+
+    def resolve(self, event):
+        if event.type == TEXT_TYPE:
+            text  = event.body
+            route = self._commands.get(text.strip())
+            if route != None:
+                return route
+            route = self._match_prefix(text)
+            if route != None:
+                return route
+            if self._regex != None:
+                match = self._regex.match(text)
+                if match != None:
+                    return self._groups[match.lastindex]
+            else:
+                for route in self._patterns:
+                    if route.pattern.match(text) != None:
+                        return route
+        elif event.type == FILE_TYPE:
+            route = self._types.get(event.mediatype)
+            if route != None:
+                return route
+        return self._types.get(event.type, self.default)
+
+
+    def __call__(self, bot, event, session=None):
+        route = self.resolve(event)
+        if route == None:
+            logger.debug('no route for event %s', event)
+            return None
+        return route(bot, event, session)
+
+
+def _combine(patterns):
+    parts  = []
+    groups = {}
+    index  = 1
+    for route in patterns:
+        pattern = route.pattern.pattern
+        if type(pattern) != str or route.pattern.flags & ~_INLINE_FLAGS or _REFERENCES.search(pattern):
+            return (None, {})
+        pattern = _GLOBAL_FLAGS.sub('', pattern)
+        if route.pattern.flags & ~re.UNICODE:
+            pattern = '(?{}:{})'.format(_inline_flags(route.pattern.flags), pattern)
+        parts.append('({})'.format(pattern))
+        groups[index] = route
+        index += 1 + route.pattern.groups
+    try:
+        return (re.compile('|'.join(parts)), groups)
+    except re.error as error:
+        logger.debug('could not combine route patterns (%s), matching them one by one', error)
+        return (None, {})
+
+
+_GLOBAL_FLAGS = re.compile(r'^(?:\(\?[aiLmsux]+\))+')
+_REFERENCES   = re.compile(r'\\[1-9]|\(\?\(\d')
+_INLINE_FLAGS = re.UNICODE | re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE | re.ASCII
+
+
+def _inline_flags(flags):
+    return ''.join(letter for (letter, flag) in (('i', re.IGNORECASE)
+                                                ,('m', re.MULTILINE)
+                                                ,('s', re.DOTALL)
+                                                ,('x', re.VERBOSE)
+                                                ,('a', re.ASCII))
+                   if flags & flag)
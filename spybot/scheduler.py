@@ -0,0 +1,146 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK        = 1
+PRIORITIES  = (INTERACTIVE, BULK)
+
+
+class _PriorityClass:
+
+    __slots__ = ('name', 'max_pending', 'pending', 'running', 'queues', 'ring', 'deficits', 'busy')
+
+    def __init__(self, name, max_pending):
+        self.name        = name
+        self.max_pending = max_pending
+        self.pending     = 0
+        self.running     = 0
+        self.queues      = {}
+        self.ring        = deque()
+        self.deficits    = {}
+        self.busy        = set()
+
+
+class SendScheduler:
+
+    def __init__(self, workers, max_pending=0, max_bulk_pending=0, quantum=1, reserved=None):
+        self.workers   = workers
+        self.quantum   = quantum
+        self.reserved  = reserved if reserved != None else (1 if workers > 1 else 0)
+        self._classes  = (_PriorityClass('interactive', max_pending if max_pending else workers * 64)
+                         ,_PriorityClass('bulk', max_bulk_pending if max_bulk_pending else workers * 64))
+        self._cond     = threading.Condition()
+        self._stopped  = False
+        self._threads  = [threading.Thread(target=self._work, name='spybot-sender-{}'.format(index), daemon=True)
+                          for index in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+
+    def submit(self, key, function, *args, **kwargs):
+        return self.schedule(INTERACTIVE, key, function, args, kwargs)
+
+
+    def schedule(self, priority, key, function, args=(), kwargs=None, cost=1):
+        future = Future()
+        item   = (cost, future, function, args, kwargs if kwargs != None else {})
+        group  = self._classes[priority]
+        with self._cond:
+            while group.pending >= group.max_pending and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                raise RuntimeError('cannot schedule new sends after shutdown')
+            group.pending += 1
+            queue = group.queues.get(key)
+            if queue == None:
+                queue = group.queues[key] = deque()
+                group.deficits[key] = 0
+                group.ring.append(key)
+            queue.append(item)
+            self._cond.notify()
+        return future
+
+
+    def _next(self):
+        for group in self._classes:
+            if group is self._classes[BULK] and group.running >= self.workers - self.reserved:
+                continue
+            ring = group.ring
+            while ring:
+                progressed = False
+                for _ in range(len(ring)):
+                    key = ring[0]
+                    if key in group.busy:
+                        ring.rotate(-1)
+                        continue
+                    progressed = True
+                    queue = group.queues[key]
+                    cost  = queue[0][0]
+                    if group.deficits[key] < cost:
+                        group.deficits[key] += self.quantum
+                        if group.deficits[key] < cost:
+                            ring.rotate(-1)
+                            continue
+                    group.deficits[key] -= cost
+                    item = queue.popleft()
+                    group.busy.add(key)
+                    if not queue:
+                        ring.popleft()
+                        del group.queues[key]
+                        del group.deficits[key]
+                    elif group.deficits[key] < queue[0][0]:
+                        ring.rotate(-1)
+                    return (group, key, item)
+                if not progressed:
+                    break
+        return None
+
+
+    def _work(self):
+        while True:
+            with self._cond:
+                task = self._next()
+                while task == None:
+                    if self._stopped and not self.pending():
+                        return
+                    self._cond.wait()
+                    task = self._next()
+                (group, key, (_, future, function, args, kwargs)) = task
+                group.running += 1
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args, **kwargs))
+                except BaseException as error:
+                    future.set_exception(error)
+            with self._cond:
+                group.running -= 1
+                group.pending -= 1
+                group.busy.discard(key)
+                self._cond.notify_all()
+
+
+    def pending(self):
+        return sum(group.pending for group in self._classes)
+
+
+    def stats(self):
+        with self._cond:
+            stats = {}
+            for group in self._classes:
+                stats[group.name] = {'pending'   : group.pending
+                                    ,'running'   : group.running
+                                    ,'recipients': len(group.queues)}
+            return stats
+
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
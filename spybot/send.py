@@ -0,0 +1,88 @@
+import threading
+
+from spybot.utils import wrap_strings
+
+
+class SendResults:
+
+    def __init__(self, results):
+        self.results   = results
+        self.succeeded = len([result for (_, result) in results if result[0]])
+        self.failed    = len(results) - self.succeeded
+
+
+    def __len__(self):
+        return len(self.results)
+
+
+    def __iter__(self):
+        return iter(self.results)
+
+
+    def __bool__(self):
+        return not self.failed
+
+
+    def __str__(self):
+        return wrap_strings([('replies', len(self.results))
+                            ,('succeeded', self.succeeded)
+                            ,('failed', self.failed)]
+                           ,separator=', '
+                           ,equal=' -> ')
+
+
+    def failures(self):
+        return [(reply, result) for (reply, result) in self.results if not result[0]]
+
+
+def future_result(future):
+    try:
+        result = future.result()
+    except Exception as error:
+        return (False, None, error)
+    if result == None:
+        return (False, None, 'no response')
+    return result
+
+
+class BroadcastResults:
+
+    def __init__(self, max_failures=100):
+        self.max_failures = max_failures
+        self.sent         = 0
+        self.succeeded    = 0
+        self.failed       = 0
+        self.failures     = []
+        self._done        = threading.Condition()
+
+
+    def __len__(self):
+        return self.sent
+
+
+    def __bool__(self):
+        return not self.failed
+
+
+    def __str__(self):
+        return wrap_strings([('recipients', self.sent)
+                            ,('succeeded', self.succeeded)
+                            ,('failed', self.failed)]
+                           ,separator=', '
+                           ,equal=' -> ')
+
+
+    def _add(self, recipient, result):
+        with self._done:
+            if result[0]:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+                if len(self.failures) < self.max_failures:
+                    self.failures.append((recipient, result))
+            self._done.notify_all()
+
+
+    def wait(self, timeout=None):
+        with self._done:
+            return self._done.wait_for(lambda: self.succeeded + self.failed >= self.sent, timeout)
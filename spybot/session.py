@@ -0,0 +1,223 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from spybot.codec import get_codec, ENCODE_ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+
+    __slots__ = ('data', 'touched')
+
+    def __init__(self, data, touched):
+        self.data    = data
+        self.touched = touched
+
+
+class MemorySessionStore:
+
+    def __init__(self, max_size=10000, ttl=0):
+        self.max_size  = max_size
+        self.ttl       = ttl
+        self.evictions = 0
+        self.expired   = 0
+        self._entries  = OrderedDict()
+        self._lock     = threading.Lock()
+
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry != None and self.ttl and now - entry.touched > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry == None:
+                data  = self._load(key)
+                entry = self._entries[key] = _Entry(data if data != None else {}, now)
+                self._evict()
+            else:
+                self._entries.move_to_end(key)
+                entry.touched = now
+            return entry.data
+
+
+    def _load(self, key):
+        return None
+
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+    def save(self, key):
+        pass
+
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+    def purge(self):
+        if not self.ttl:
+            return 0
+        deadline = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [key for (key, entry) in self._entries.items() if entry.touched < deadline]
+            for key in expired:
+                del self._entries[key]
+            self.expired += len(expired)
+        return len(expired)
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+    def stats(self):
+        return {'sessions' : len(self._entries)
+               ,'evictions': self.evictions
+               ,'expired'  : self.expired}
+
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionStore(MemorySessionStore):
+
+    def __init__(self, path, max_size=10000, ttl=0, flush_interval=1.0, codec=None):
+        MemorySessionStore.__init__(self, max_size, ttl)
+        self.path           = path
+        self.flush_interval = flush_interval
+        self.codec          = get_codec(codec)
+        self.writes         = 0
+        self._dirty         = {}
+        self._flushing      = {}
+        self._db_lock       = threading.Lock()
+        self._db            = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS sessions ('
+                         'key TEXT PRIMARY KEY, '
+                         'data BLOB NOT NULL, '
+                         'updated REAL NOT NULL)')
+        self._stop          = threading.Event()
+        self._writer        = threading.Thread(target=self._flush_loop, name='spybot-sessions', daemon=True)
+        self._writer.start()
+
+
+    def _load(self, key):
+        for pending in (self._dirty, self._flushing):
+            if key in pending:
+                return pending[key]
+        with self._db_lock:
+            row = self._db.execute('SELECT data, updated FROM sessions WHERE key = ?', (key,)).fetchone()
+        if row == None:
+            return None
+        (data, updated) = row
+        if self.ttl and time.time() - updated > self.ttl:
+            self.expired += 1
+            return None
+        return self.codec.loads(data)
+
+
+    def save(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry != None:
+                self._dirty[key] = entry.data
+
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._dirty[key] = None
+
+
+    def purge(self):
+        expired = MemorySessionStore.purge(self)
+        if self.ttl:
+            with self._db_lock:
+                self._db.execute('DELETE FROM sessions WHERE updated < ?', (time.time() - self.ttl,))
+        return expired
+
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as error:
+                logger.error('could not flush sessions: %r', error)
+
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return 0
+            (dirty, self._dirty) = (self._dirty, {})
+            self._flushing = dirty
+        now     = time.time()
+        updates = []
+        deletes = []
+        for (key, data) in dirty.items():
+            if data == None:
+                deletes.append((key,))
+                continue
+            try:
+                updates.append((key, self.codec.dumps(data), now))
+            except RuntimeError:
+                with self._lock:
+                    self._dirty.setdefault(key, data)
+            except ENCODE_ERRORS:
+                logger.error('could not encode session %r, skipping it', key)
+        try:
+            with self._db_lock:
+                self._db.execute('BEGIN')
+                if updates:
+                    self._db.executemany('INSERT OR REPLACE INTO sessions (key, data, updated) VALUES (?, ?, ?)', updates)
+                if deletes:
+                    self._db.executemany('DELETE FROM sessions WHERE key = ?', deletes)
+                self._db.execute('COMMIT')
+        except sqlite3.Error:
+            with self._db_lock:
+                if self._db.in_transaction:
+                    self._db.execute('ROLLBACK')
+            with self._lock:
+                dirty.update(self._dirty)
+                self._dirty = dirty
+            raise
+        finally:
+            with self._lock:
+                self._flushing = {}
+        self.writes += len(dirty)
+        logger.debug('flushed %d session(s)', len(dirty))
+        return len(dirty)
+
+
+    def stats(self):
+        stats = MemorySessionStore.stats(self)
+        stats['dirty']  = len(self._dirty)
+        stats['writes'] = self.writes
+        return stats
+
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
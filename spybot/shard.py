@@ -0,0 +1,219 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+
+from spybot.api import Bot
+from spybot.scheduler import INTERACTIVE
+from spybot.utils import log
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(sender, shards):
+    return zlib.crc32(sender.encode('utf-8')) % shards
+
+
+def _default_start_method():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return 'forkserver'
+    return 'spawn'
+
+
+class _InlineSender:
+
+    def submit(self, key, function, *args, **kwargs):
+        return self.schedule(None, key, function, args, kwargs)
+
+
+    def schedule(self, priority, key, function, args=(), kwargs=None, cost=1):
+        future = Future()
+        try:
+            future.set_result(function(*args, **(kwargs if kwargs != None else {})))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+    def pending(self):
+        return 0
+
+
+    def stats(self):
+        return {}
+
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class _WorkerBot(Bot):
+
+    def __init__(self, token, replies, **kwargs):
+        Bot.__init__(self, token, send_workers=0, **kwargs)
+        self.sender  = _InlineSender()
+        self.replies = replies
+
+
+    def _send_payload(self, data, recipient, entry=None):
+        self.replies.put((recipient, data))
+        return (True, None, None)
+
+
+    def _handle_event(self, event, event_handler):
+        event = self._parse_frame(event)
+        if event == None:
+            return
+        if event.is_file:
+            event = self._add_download_method(event)
+        self._run_event_handler(event, event_handler)
+
+
+def _worker_main(token, event_handler, options, inbox, replies):
+    bot = _WorkerBot(token, replies, event_handler=event_handler, **options)
+    try:
+        while True:
+            frame = inbox.get()
+            if frame == None:
+                break
+            try:
+                bot._handle_event(frame, event_handler)
+            except Exception as error:
+                logger.error('event handling failed with %r', error)
+    finally:
+        bot.close()
+        replies.put(None)
+
+
+class ShardedBot(Bot):
+
+    WORKER_CHECK_INTERVAL = 1.0
+    WORKER_EXIT_TIMEOUT   = 10.0
+
+    def __init__(self
+                ,token
+                ,event_handler  = None
+                ,processes      = 0
+                ,queue_size     = 1024
+                ,worker_options = None
+                ,context        = None
+                ,**kwargs):
+        Bot.__init__(self, token, event_handler=event_handler, **kwargs)
+        self.processes      = processes if processes else (os.cpu_count() or 1)
+        self.queue_size     = queue_size
+        self.worker_options = worker_options if worker_options != None else {}
+        self.context        = multiprocessing.get_context(context if context != None else _default_start_method())
+        self._inboxes       = []
+        self._workers       = []
+        self._replies       = None
+        self._collector     = None
+
+
+    def start(self):
+        if self._workers:
+            return
+        options = dict(self.worker_options)
+        options.setdefault('codec', self.codec.name)
+        options.setdefault('structured_logging', self.structured_logging)
+        options.setdefault('warn_not_implemented', self.warn_not_implemented)
+        options.setdefault('request_timeout', self.request_timeout)
+        options.setdefault('base_url', self.BASE_URL)
+        self._replies = self.context.Queue(self.queue_size)
+        for index in range(self.processes):
+            inbox  = self.context.Queue(self.queue_size)
+            worker = self.context.Process(target=_worker_main
+                                         ,args=(self.token, self.event_handler, options, inbox, self._replies)
+                                         ,name='spybot-shard-{}'.format(index)
+                                         ,daemon=True)
+            worker.start()
+            self._inboxes.append(inbox)
+            self._workers.append(worker)
+        self._collector = threading.Thread(target=self._collect, name='spybot-shard-collector', daemon=True)
+        self._collector.start()
+        logger.info('started %d shard worker process(es)', self.processes)
+
+
+    def run(self):
+        self.start()
+        Bot.run(self)
+
+
+    def _handle_event(self, event, event_handler):
+        frame = event
+        event = self._parse_frame(frame)
+        if event == None:
+            return
+        log(logger, logging.INFO, 'got new event', event, self.structured_logging)
+        self._put(shard_of(event.sender, self.processes), frame)
+
+
+    def _put(self, index, item):
+        worker = self._workers[index]
+        while True:
+            if not worker.is_alive():
+                logger.error('shard worker %s exited with code %r', worker.name, worker.exitcode)
+                raise RuntimeError('shard worker {} exited with code {!r}'.format(worker.name, worker.exitcode))
+            try:
+                self._inboxes[index].put(item, timeout=self.WORKER_CHECK_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+
+    def _collect(self):
+        running = self.processes
+        while running:
+            try:
+                item = self._replies.get(timeout=self.WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in self._workers):
+                    logger.error('%d shard worker(s) exited without finishing', running)
+                    return
+                continue
+            if item == None:
+                running -= 1
+                continue
+            (recipient, data) = item
+            key    = recipient if self.ordered_replies else object()
+            future = self._schedule_payload(INTERACTIVE, key, data, recipient)
+            future.add_done_callback(self._reply_sent)
+
+
+    def _reply_sent(self, future):
+        error = future.exception()
+        if error != None:
+            logger.error('sending reply failed with %r', error)
+
+
+    def close(self):
+        for index in range(len(self._inboxes)):
+            try:
+                self._put(index, None)
+            except RuntimeError:
+                pass
+        for worker in self._workers:
+            self._join(worker)
+        for inbox in self._inboxes:
+            inbox.cancel_join_thread()
+        if self._collector != None:
+            self._collector.join()
+        Bot.close(self)
+
+
+    def _join(self, worker):
+        waited = 0.0
+        while True:
+            worker.join(self.WORKER_CHECK_INTERVAL)
+            if not worker.is_alive():
+                return
+            if any(other.exitcode not in (None, 0) for other in self._workers):
+                waited += self.WORKER_CHECK_INTERVAL
+                if waited >= self.WORKER_EXIT_TIMEOUT:
+                    break
+        logger.error('terminating shard worker %s, it did not exit %.0fs after another worker died'
+                    ,worker.name, self.WORKER_EXIT_TIMEOUT)
+        worker.terminate()
+        worker.join()
@@ -0,0 +1,82 @@
+import re
+
+_TOKENS        = re.compile(rb'[{}"\\]')
+_STRING_TOKENS = re.compile(rb'["\\]')
+
+_OPEN_BRACE  = ord('{')
+_CLOSE_BRACE = ord('}')
+_QUOTE       = ord('"')
+_BACKSLASH   = ord('\\')
+
+
+class StreamDecoder:
+
+    def __init__(self, encoding='utf-8'):
+        self.encoding   = encoding
+        self._buffer    = bytearray()
+        self._position  = 0
+        self._start     = 0
+        self._depth     = 0
+        self._in_string = False
+
+
+    def feed(self, chunk):
+        buffer = self._buffer
+        buffer += chunk
+        end      = len(buffer)
+        position = self._position
+        frames   = []
+        while position < end:
+            if not self._depth:
+                start = buffer.find(b'{', position)
+                if start == -1:
+                    position = end
+                    break
+                self._start = start
+                self._depth = 1
+                position    = start + 1
+                continue
+            if self._in_string:
+                match = _STRING_TOKENS.search(buffer, position)
+            else:
+                match = _TOKENS.search(buffer, position)
+            if match == None:
+                position = end
+                break
+            token    = buffer[match.start()]
+            position = match.end()
+            if token == _BACKSLASH:
+                position += 1
+            elif token == _QUOTE:
+                self._in_string = not self._in_string
+            elif token == _OPEN_BRACE:
+                self._depth += 1
+            elif token == _CLOSE_BRACE:
+                self._depth -= 1
+                if not self._depth:
+                    frame = buffer[self._start:position]
+                    frames.append(frame.decode(self.encoding) if self.encoding else bytes(frame))
+        if self._depth:
+            discard = self._start
+        else:
+            discard = min(position, end)
+        if discard:
+            del buffer[:discard]
+            position   -= discard
+            self._start = 0
+        self._position = position
+        return frames
+
+
+    def pending(self):
+        if not self._depth:
+            return 0
+        return len(self._buffer) - self._start
+
+
+def iter_frames(chunks, decoder=None):
+    if decoder == None:
+        decoder = StreamDecoder()
+    for chunk in chunks:
+        for frame in decoder.feed(chunk):
+            yield frame
@@ -0,0 +1,194 @@
+import cProfile
+import itertools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from os.path import join
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('read', 'decode', 'parse', 'download_methods', 'handler', 'serialize', 'send')
+
+
+class Span:
+
+    __slots__ = ('tracer', 'stage', 'sender', 'time', 'recipient', 'started', 'duration', 'error')
+
+    def __init__(self, tracer, stage, sender=None, time=None, recipient=None):
+        self.tracer    = tracer
+        self.stage     = stage
+        self.sender    = sender
+        self.time      = time
+        self.recipient = recipient
+        self.started   = None
+        self.duration  = None
+        self.error     = None
+
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+
+    def __exit__(self, error_type, error, _):
+        self.duration = time.perf_counter() - self.started
+        self.error    = error
+        self.tracer._emit(self)
+
+
+    def as_dict(self):
+        return {'stage'    : self.stage
+               ,'sender'   : self.sender
+               ,'time'     : self.time
+               ,'recipient': self.recipient
+               ,'duration' : self.duration
+               ,'error'    : self.error}
+
+
+class _NullSpan:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *_):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Sampler:
+
+    def __init__(self, every=1000, directory='.', profile=True, memory=False, top=25):
+        self.every     = every
+        self.directory = directory
+        self.profile   = profile
+        self.memory    = memory
+        self.top       = top
+        self.samples   = 0
+        self._counter  = itertools.count(1)
+        self._lock     = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+
+    def select(self):
+        if next(self._counter) % self.every:
+            return False
+        return self._lock.acquire(blocking=False)
+
+
+    def run(self, event):
+        return _Sample(self, event)
+
+
+class _Sample:
+
+    def __init__(self, sampler, event):
+        self.sampler  = sampler
+        self.event    = event
+        self.profiler = None
+        self.snapshot = None
+        self.tracing  = False
+
+
+    def __enter__(self):
+        if self.sampler.memory:
+            self.tracing = not tracemalloc.is_tracing()
+            if self.tracing:
+                tracemalloc.start()
+            self.snapshot = tracemalloc.take_snapshot()
+        if self.sampler.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+
+    def __exit__(self, *_):
+        try:
+            if self.profiler != None:
+                self.profiler.disable()
+            self.sampler.samples += 1
+            name = join(self.sampler.directory, 'spybot-sample-{}-{}'.format(self.sampler.samples, self.event.time))
+            if self.profiler != None:
+                self.profiler.dump_stats(name + '.prof')
+            if self.snapshot != None:
+                ignored    = [tracemalloc.Filter(False, cProfile.__file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+                statistics = tracemalloc.take_snapshot().filter_traces(ignored).compare_to(self.snapshot.filter_traces(ignored)
+                                                                                          ,'lineno')
+                with open(name + '.memory.txt', 'w') as fd:
+                    fd.write('event {} from {}\n'.format(self.event.type, self.event.sender))
+                    for statistic in statistics[:self.sampler.top]:
+                        fd.write('{}\n'.format(statistic))
+                if self.tracing:
+                    tracemalloc.stop()
+            logger.info('dumped profile sample of event from %r to %s.*', self.event.sender, name)
+        except (OSError, ValueError) as error:
+            logger.error('could not dump profile sample: %r', error)
+        finally:
+            self.sampler._lock.release()
+
+
+class Tracer:
+
+    def __init__(self, hooks=None, sampler=None):
+        self.hooks   = list(hooks) if hooks != None else []
+        self.sampler = sampler
+
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+
+    def span(self, stage, sender=None, time=None, recipient=None):
+        if not self.hooks:
+            return _NULL_SPAN
+        return Span(self, stage, sender, time, recipient)
+
+
+    def event_span(self, stage, event):
+        if not self.hooks:
+            return _NULL_SPAN
+        return Span(self, stage, event.sender, event.time)
+
+
+    def data_span(self, stage, data):
+        if not self.hooks:
+            return _NULL_SPAN
+        if type(data) != dict:
+            return Span(self, stage)
+        return Span(self, stage, data.get('from'), data.get('time'))
+
+
+    def sample(self, event):
+        if self.sampler == None or not self.sampler.select():
+            return _NULL_SPAN
+        return self.sampler.run(event)
+
+
+    def _emit(self, span):
+        for hook in self.hooks:
+            try:
+                hook(span)
+            except Exception as error:
+                logger.error('trace hook %r failed with %r', hook, error)
+
+
+def stage_histogram(registry, name='spybot_stage_seconds'):
+    histogram = registry.histogram(name, 'Duration of each event pipeline stage', ('stage',))
+    def hook(span):
+        histogram.observe(span.duration, (span.stage,))
+    return hook
+
+
+def slow_spans(threshold, log=logger):
+    def hook(span):
+        if span.duration >= threshold:
+            log.warning('stage %r took %.1fms (sender -> %s, time -> %s, recipient -> %s)'
+                       ,span.stage, span.duration * 1000, span.sender, span.time, span.recipient)
+    return hook
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import uuid
+
+from spybot import reply
+from spybot.utils import wrap_strings
+
+
+def file_digest(fd, chunk_size=65536, size=None):
+    digest = hashlib.sha256()
+    chunk = fd.read(chunk_size if size == None else min(chunk_size, size))
+    while chunk:
+        digest.update(chunk)
+        if size != None:
+            size -= len(chunk)
+            if size <= 0:
+                break
+        chunk = fd.read(chunk_size if size == None else min(chunk_size, size))
+    return digest.hexdigest()
+
+
+class MultipartStream:
+
+    def __init__(self, fd, size, name, field='file', content_type='application/octet-stream'):
+        self.boundary = uuid.uuid4().hex
+        self.fd       = fd
+        self.size     = size
+        self.digest   = hashlib.sha256()
+        self._left    = size
+        self._head    = ('--{}\r\n'
+                         'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'
+                         'Content-Type: {}\r\n\r\n').format(self.boundary
+                                                           ,field
+                                                           ,name.replace('"', '%22')
+                                                           ,content_type).encode('utf-8')
+        self._tail    = '\r\n--{}--\r\n'.format(self.boundary).encode('utf-8')
+        self._parts   = [self._head, None, self._tail]
+
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary={}'.format(self.boundary)
+
+
+    def __len__(self):
+        return len(self._head) + self.size + len(self._tail)
+
+
+    def read(self, size=-1):
+        if size == None or size < 0:
+            size = len(self)
+        chunks = []
+        while self._parts and size > 0:
+            part = self._parts[0]
+            if part == None:
+                chunk = self.fd.read(min(size, self._left)) if self._left else b''
+                if not chunk:
+                    if self._left:
+                        raise ValueError('file ended {} byte(s) before its size of {} bytes'.format(self._left, self.size))
+                    self._parts.pop(0)
+                    continue
+                self._left -= len(chunk)
+                self.digest.update(chunk)
+            else:
+                chunk = part[:size]
+                if len(chunk) < len(part):
+                    self._parts[0] = part[len(chunk):]
+                else:
+                    self._parts.pop(0)
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+
+class UploadedFile:
+
+    def __init__(self, url, name, size, digest=None):
+        self.url    = url
+        self.name   = name
+        self.size   = size
+        self.digest = digest
+
+
+    def __str__(self):
+        return wrap_strings([('name', self.name)
+                            ,('size', self.size, 'B')
+                            ,('URL', self.url)]
+                           ,separator=', '
+                           ,equal=' -> ')
+
+
+    def image(self, to, thumbnail_url, width, height, body=' ', keyboard=None):
+        return reply.Image(to, self.name, self.url, self.size, thumbnail_url, width, height, body, keyboard)
+
+
+    def gif(self, to, thumbnail_url, width, height, body=' ', keyboard=None):
+        return reply.Gif(to, self.name, self.url, self.size, thumbnail_url, width, height, body, keyboard)
+
+
+    def video(self, to, duration, thumbnail_url, width, height, body=' ', keyboard=None):
+        return reply.Video(to, self.name, self.url, self.size, duration, thumbnail_url, width, height, body, keyboard)
+
+
+    def push_to_talk(self, to, duration, body=' ', keyboard=None):
+        return reply.PushToTalk(to, self.name, self.url, self.size, duration, body, keyboard)
+
+
+    def attachment(self, to, body=' ', keyboard=None):
+        return reply.Attachment(to, self.name, self.url, self.size, body, keyboard)
+
+
+def open_upload(path_or_fileobj, name=None):
+    if not hasattr(path_or_fileobj, 'read'):
+        fd = open(path_or_fileobj, 'rb')
+        return (fd, True, name if name else os.path.basename(os.fsdecode(path_or_fileobj)))
+    if name == None:
+        name = os.path.basename(str(getattr(path_or_fileobj, 'name', 'file')))
+    return (path_or_fileobj, False, name)
+
+
+def is_seekable(fd):
+    try:
+        return fd.seekable()
+    except AttributeError:
+        return False
+
+
+def file_size(fd):
+    try:
+        return os.fstat(fd.fileno()).st_size - fd.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+    position = fd.tell()
+    fd.seek(0, os.SEEK_END)
+    size = fd.tell() - position
+    fd.seek(position)
+    return size
@@ -1,3 +1,5 @@
+import json
+from inspect import getfullargspec, isfunction, ismethod, iscoroutinefunction, isasyncgenfunction
 
 
 def wrap_strings(objects, separator=" ", equal=':'):
@@ -13,3 +15,58 @@ def wrap_strings(objects, separator=" ", equal=':'):
             (pre, value) = item
             strings.append("{}{}{}".format(pre, equal, value))
         return separator.join(strings)
+
+
+class StructuredMessage:
+
+    __slots__ = ('message', 'value', 'fields')
+
+    def __init__(self, message, value=None, fields=None):
+        self.message = message
+        self.value   = value
+        self.fields  = fields
+
+
+    def as_dict(self):
+        data = {'message': self.message}
+        if self.value != None:
+            data.update(self.value.as_dict())
+        if self.fields:
+            data.update(self.fields)
+        return data
+
+
+    def __str__(self):
+        return json.dumps(self.as_dict(), ensure_ascii=False, default=str)
+
+
+def log(logger, level, message, value=None, structured=False, **fields):
+    if not logger.isEnabledFor(level):
+        return
+    if structured:
+        logger.log(level, '%s', StructuredMessage(message, value, fields))
+        return
+    if value != None:
+        message = '{} {}'.format(message, value)
+    if fields:
+        message = '{} ({})'.format(message, wrap_strings(list(fields.items()), separator=', ', equal=' -> '))
+    logger.log(level, '%s', message)
+
+
+def argument_count(function):
+    if not isfunction(function) and not ismethod(function) and hasattr(function, '__call__') \
+       and not isinstance(function, type):
+        call = function.__call__
+        if ismethod(call):
+            function = call
+    count = len(getfullargspec(function).args)
+    if ismethod(function):
+        count -= 1
+    return count
+
+
+def is_async_callable(function):
+    if not isfunction(function) and not ismethod(function) and hasattr(function, '__call__') \
+       and not isinstance(function, type):
+        function = function.__call__
+    return iscoroutinefunction(function) or isasyncgenfunction(function)
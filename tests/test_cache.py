@@ -0,0 +1,45 @@
+import hashlib
+import os
+from os.path import join
+
+import pytest
+
+from spybot.cache import FileCache
+
+
+def write(filename, data):
+    with open(filename, 'wb') as fd:
+        fd.write(data)
+
+
+def read(filename):
+    with open(filename, 'rb') as fd:
+        return fd.read()
+
+
+@pytest.mark.parametrize('hardlink', [False, True])
+def test_editing_served_file_leaves_blob_unchanged(tmp_path, hardlink):
+    cache = FileCache(str(tmp_path / 'cache'), hardlink=hardlink)
+    a     = str(tmp_path / 'a.bin')
+    b     = str(tmp_path / 'b.bin')
+    c     = str(tmp_path / 'c.bin')
+    write(a, b'original content')
+    blob = cache.put('http://example/file', a)
+    with open(a, 'r+b') as fd:
+        fd.write(b'EDITED')
+    assert cache.get('http://example/file', b)
+    assert read(b) == b'original content'
+    if not hardlink:
+        with open(b, 'r+b') as fd:
+            fd.write(b'EDITED')
+    assert cache.get('http://example/file', c)
+    assert read(c) == b'original content'
+    blob_name = join(str(tmp_path / 'cache'), 'blobs', blob)
+    assert hashlib.sha256(read(blob_name)).hexdigest() == blob
+    assert not os.stat(blob_name).st_mode & 0o222
+
+
+def test_miss(tmp_path):
+    cache = FileCache(str(tmp_path / 'cache'))
+    assert not cache.get('missing', str(tmp_path / 'x'))
+    assert cache.stats()['misses'] == 1
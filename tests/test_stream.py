@@ -0,0 +1,74 @@
+import json
+import random
+
+from spybot.stream import StreamDecoder, iter_frames
+
+
+EVENTS = [{'type': 'TEXT', 'from': 'user1', 'time': 1, 'body': 'hello'}
+         ,{'type': 'TEXT', 'from': 'user2', 'time': 2, 'body': 'braces {in} "quotes" and \\ backslash }{'}
+         ,{'type': 'TEXT', 'from': 'user3', 'time': 3, 'body': 'سلام دنیا 👋'}
+         ,{'type': 'LOCATION', 'from': 'user4', 'time': 4, 'latitude': 35.7, 'longitude': 51.4, 'nested': {'a': {'b': []}}}]
+
+
+def stream(events=EVENTS, separator=b'\r\n'):
+    return separator.join(json.dumps(event, ensure_ascii=False).encode('utf-8') for event in events)
+
+
+def decode(chunks, encoding='utf-8'):
+    return [json.loads(frame) for frame in iter_frames(chunks, StreamDecoder(encoding))]
+
+
+def test_one_byte_per_feed():
+    data = stream()
+    assert decode(data[index:index + 1] for index in range(len(data))) == EVENTS
+
+
+def test_several_frames_in_one_chunk():
+    decoder = StreamDecoder()
+    frames  = decoder.feed(stream())
+    assert [json.loads(frame) for frame in frames] == EVENTS
+    assert decoder.pending() == 0
+
+
+def test_backslash_at_end_of_chunk():
+    data  = json.dumps({'body': 'a\\"}b'}).encode('utf-8')
+    split = data.index(b'\\') + 1
+    assert decode([data[:split], data[split:]]) == [{'body': 'a\\"}b'}]
+    data  = json.dumps({'body': 'quote " inside'}).encode('utf-8')
+    split = data.index(b'\\') + 1
+    assert decode([data[:split], data[split:]]) == [{'body': 'quote " inside'}]
+
+
+def test_braces_and_quotes_inside_strings():
+    events = [{'body': '}}}'}, {'body': '{{{'}, {'body': '"{"'}, {'body': '\\'}, {'body': '\\"}'}]
+    assert decode([stream(events)]) == events
+
+
+def test_multibyte_utf8_split_across_chunks():
+    data   = stream([EVENTS[2]])
+    middle = data.index('👋'.encode('utf-8')) + 2
+    assert decode([data[:middle], data[middle:]]) == [EVENTS[2]]
+    assert decode([data[:middle], data[middle:]], encoding=None) == [EVENTS[2]]
+
+
+def test_garbage_between_frames():
+    data = b'\r\n\r\nkeep-alive\n' + stream(separator=b'\n0\r\n  garbage ]] "\n') + b'\r\ntrailing'
+    assert decode([data]) == EVENTS
+
+
+def test_partial_frame_is_pending():
+    decoder = StreamDecoder()
+    data    = stream([EVENTS[0]])
+    assert decoder.feed(data[:-1]) == []
+    assert decoder.pending() == len(data) - 1
+    assert len(decoder.feed(data[-1:])) == 1
+    assert decoder.pending() == 0
+
+
+def test_random_splits():
+    generator = random.Random(4)
+    data      = stream(EVENTS * 20)
+    for _ in range(200):
+        points = sorted(generator.sample(range(1, len(data)), generator.randint(1, 40)))
+        chunks = [data[start:end] for (start, end) in zip([0] + points, points + [len(data)])]
+        assert decode(chunks) == EVENTS * 20